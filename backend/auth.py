@@ -1,6 +1,9 @@
+import hashlib
+import os
+import time
 from datetime import datetime, timedelta, timezone
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+
+from caches import TTLLRUCache
 
 
 # ✅ Configuration
@@ -8,20 +11,35 @@ SECRET_KEY = "supersecretkey"  # store in .env in production
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-# ✅ Initialize password hashing
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# ✅ Password hashing context, built on first use (jose and passlib are imported lazily too)
+_pwd_context = None
+
+# ✅ Already validated tokens, keyed by token digest (never kept past their exp)
+token_cache = TTLLRUCache(
+    max_entries=int(os.getenv("BILLYBOT_TOKEN_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("BILLYBOT_TOKEN_CACHE_TTL", "60")),
+)
 
 
 # ----------------------------
 # 🔒 Password Hashing & Verify
 # ----------------------------
+def pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+    return _pwd_context
+
+
 def hash_password(password: str) -> str:
     """
     Hashes a plain text password using argon2.
     """
     if not password:
         raise ValueError("Password cannot be empty")
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -31,7 +49,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     if not plain_password or not hashed_password:
         return False
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        return pwd_context().verify(plain_password, hashed_password)
     except Exception:
         return False
 
@@ -43,6 +61,8 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     """
     Creates a JWT access token with an expiration time.
     """
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
@@ -53,9 +73,31 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
 def decode_access_token(token: str) -> dict | None:
     """
     Decodes and validates a JWT token. Returns the payload if valid, else None.
+    Tokens that name no tenant (neither a workspace nor a subject) are invalid.
+    Valid tokens are cached for a short TTL, capped at their expiry.
     """
+    from jose import JWTError, jwt
+
+    if not token:
+        return None
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload) if payload.get("exp", float("inf")) > time.time() else None
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
+    if not (payload.get("workspace") or payload.get("sub")):
+        return None
+    ttl = min(token_cache.ttl, payload.get("exp", float("inf")) - time.time())
+    if ttl > 0:
+        token_cache.set(key, payload, ttl=ttl)
+    return dict(payload)
+
+
+def tenant_id(payload: dict) -> str:
+    """
+    Returns the tenant a decoded token belongs to: its workspace claim if set, else the user ID.
+    """
+    return payload.get("workspace") or payload["sub"]
@@ -0,0 +1,10 @@
+"""
+Offline benchmarks for ingestion throughput and retrieval latency.
+
+Everything runs locally: PDFs are generated on the fly and Ollama is replaced
+by deterministic stand-ins (see fakes.py), so results only reflect BillyBot's
+own code and can be compared across commits. Run from the backend directory:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.compare baseline.json bench.json
+"""
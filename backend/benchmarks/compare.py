@@ -0,0 +1,87 @@
+# compare.py
+"""
+Compares two benchmark result files and flags regressions.
+
+Throughputs (`*_per_sec`) regress when they drop, latencies (`*_ms`,
+`*_seconds`) and peak RSS when they grow, by more than --threshold.
+Exits with status 1 if any metric regressed.
+
+    python -m benchmarks.compare baseline.json bench.json --threshold 0.15
+"""
+import argparse
+import json
+import sys
+
+# Noisy or informational values that are reported but never fail the comparison
+IGNORED = ("generate_pdfs_seconds", "fill_seconds", "stages.")
+
+
+def flatten(results: dict) -> dict:
+    metrics = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(f"{prefix}.{key}" if prefix else key, item)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[prefix] = value
+
+    walk("", {"ingest": results.get("ingest"), "retrieval": results.get("retrieval"),
+              "peak_rss_mb": results.get("peak_rss_mb")})
+    return metrics
+
+
+def direction(name: str) -> int:
+    """
+    +1 when higher is better, -1 when lower is better, 0 for counts and labels.
+    """
+    if any(part in name for part in IGNORED):
+        return 0
+    if name.endswith("_per_sec"):
+        return 1
+    if name.endswith(("_ms", "_seconds")) or name.startswith("peak_rss_mb") or ".peak_rss_mb." in name:
+        return -1
+    return 0
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    Returns (name, baseline, current, relative change, regressed) for every metric in both files.
+    """
+    old, new = flatten(baseline), flatten(current)
+    rows = []
+    for name in sorted(old.keys() & new.keys()):
+        better = direction(name)
+        if not better or not old[name]:
+            continue
+        change = (new[name] - old[name]) / old[name]
+        rows.append((name, old[name], new[name], change, change * better < -threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare BillyBot benchmark results")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"baseline {baseline.get('commit')} -> current {current.get('commit')}")
+    for name, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<48} {old:>12.2f} {new:>12.2f} {change:>+8.1%}{flag}")
+
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# fakes.py
+"""
+Deterministic local stand-ins for OllamaEmbeddings and OllamaLLM.
+
+Embeddings use feature hashing over lowercased words, so texts sharing words
+get similar vectors and similarity search behaves like it would on real data.
+Optional fixed latencies simulate model round-trips.
+"""
+import math
+import re
+import time
+import zlib
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+import clients
+
+
+_WORD = re.compile(r"\w+")
+
+
+def hashed_vector(text: str, dimensions: int = 768) -> List[float]:
+    vector = [0.0] * dimensions
+    for word in _WORD.findall(text.lower()):
+        h = zlib.crc32(word.encode())
+        vector[h % dimensions] += 1.0 if h & 0x80000000 else -1.0
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self, dimensions: int = 768, latency_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self.texts = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return [hashed_vector(t, self.dimensions) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeLLM:
+    """
+    Answers with the first words of the prompt's context, so output length is
+    stable; stream() yields them one word at a time like a token stream.
+    """
+
+    def __init__(self, answer_words: int = 64, latency_ms: float = 0.0, token_latency_ms: float = 0.0):
+        self.answer_words = answer_words
+        self.latency_ms = latency_ms
+        self.token_latency_ms = token_latency_ms
+
+    def _words(self, prompt: str) -> List[str]:
+        context = prompt.split("CONTEXT:", 1)[-1]
+        return context.split()[:self.answer_words]
+
+    def invoke(self, prompt: str) -> str:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return " ".join(self._words(prompt))
+
+    def stream(self, prompt: str):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        for word in self._words(prompt):
+            if self.token_latency_ms:
+                time.sleep(self.token_latency_ms / 1000)
+            yield word + " "
+
+
+def install_fakes(embedding_model: str, llm_model: str, embeddings: FakeEmbeddings, llm: FakeLLM):
+    """
+    Registers the fakes as the shared clients for these models, so
+    VectorStoreManager and chatbot pick them up through clients.get_embeddings
+    and clients.get_llm (default parameters) without any other patching.
+    """
+    clients.clear_clients()
+    with clients._lock:
+        clients._clients[("embeddings", embedding_model)] = embeddings
+        clients._clients[("llm", llm_model, 0.0, ())] = llm
@@ -0,0 +1,131 @@
+# imports.py
+"""
+Import-time budget for the API and Streamlit entry points.
+
+Imports each entry point in a fresh interpreter (as a cold-started worker
+does) --runs times with `python -X importtime`, and reports the median import
+time, the slowest modules it imports directly and any heavy dependencies that were
+loaded even though they should wait for first use. Exits with status 1 if a
+median exceeds its budget or a deferred module was imported.
+
+    python -m benchmarks.imports --runs 5 --budget main=0.6,streamlit_app=2.0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.run import git_commit
+
+SCHEMA_VERSION = 1
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+
+# Entry point -> directory it is imported from
+ENTRY_POINTS = {"main": BACKEND_DIR, "streamlit_app": ROOT_DIR}
+DEFAULT_BUDGETS = "main=0.6,streamlit_app=2.0"
+# Loaded on first manager, ingest or question (or at startup for the MongoDB client), never at import
+DEFERRED = ("langchain_community", "langchain_chroma", "langchain_ollama", "langchain_text_splitters",
+            "langchain_core", "chromadb", "faiss", "pypdf", "motor", "pymongo", "bson", "httpx")
+
+_PROBE = (
+    "import sys, time\n"
+    "sys.path.insert(0, {path!r})\n"
+    "sys.stderr.write('IMPORT_START\\n')\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print('IMPORT_SECONDS', time.perf_counter() - start)\n"
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time budget for the BillyBot entry points")
+    parser.add_argument("--entry-points", default=",".join(ENTRY_POINTS))
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per entry point")
+    parser.add_argument("--budget", default=DEFAULT_BUDGETS, help="seconds per entry point, e.g. main=0.6")
+    parser.add_argument("--top", type=int, default=10, help="slowest direct imports to report")
+    parser.add_argument("--output", default="imports-results.json")
+    return parser.parse_args(argv)
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Rows of `-X importtime` output after the probe's start marker, as
+    (module, self_us, cumulative_us, depth); depth 0 is the entry point and
+    depth 1 the modules it imports itself.
+    """
+    rows = []
+    for line in stderr.split("IMPORT_START\n", 1)[-1].splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(module: str, path: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(path=path, module=module)],
+        capture_output=True, text=True, cwd=path,
+    )
+    seconds = [float(line.split()[1]) for line in result.stdout.splitlines() if line.startswith("IMPORT_SECONDS")]
+    if result.returncode != 0 or not seconds:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    return {"seconds": seconds[0], "rows": rows}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    budgets = {}
+    for item in filter(None, args.budget.split(",")):
+        name, seconds = item.split("=")
+        budgets[name] = float(seconds)
+
+    results = {
+        "schema": SCHEMA_VERSION,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "entry_points": {},
+    }
+    failed = False
+    for module in filter(None, args.entry_points.split(",")):
+        runs = [measure(module, ENTRY_POINTS[module]) for _ in range(args.runs)]
+        median = statistics.median(run["seconds"] for run in runs)
+        # Module breakdown from the run closest to the median
+        rows = min(runs, key=lambda run: abs(run["seconds"] - median))["rows"]
+        direct = sorted((r for r in rows if r[3] == 1), key=lambda r: -r[2])[:args.top]
+        deferred = sorted({r[0] for r in rows if r[0].split(".")[0] in DEFERRED})
+        budget = budgets.get(module)
+        over = budget is not None and median > budget
+        failed = failed or over or bool(deferred)
+        results["entry_points"][module] = {
+            "import_seconds": median,
+            "runs": [run["seconds"] for run in runs],
+            "budget_seconds": budget,
+            "over_budget": over,
+            "deferred_imported": deferred,
+            "slowest": [{"module": r[0], "self_ms": r[1] / 1000, "cumulative_ms": r[2] / 1000} for r in direct],
+        }
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    for module, r in results["entry_points"].items():
+        budget = f"{r['budget_seconds']:.2f}s" if r["budget_seconds"] is not None else "-"
+        status = "OVER BUDGET" if r["over_budget"] else "ok"
+        print(f"{module}: {r['import_seconds'] * 1000:.0f} ms (budget {budget}) {status}")
+        for row in r["slowest"]:
+            print(f"    {row['cumulative_ms']:>8.1f} ms  {row['module']}")
+        if r["deferred_imported"]:
+            print(f"    imported at startup but should be deferred: {', '.join(r['deferred_imported'])}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
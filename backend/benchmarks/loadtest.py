@@ -0,0 +1,348 @@
+# loadtest.py
+"""
+End-to-end HTTP load test of the FastAPI service.
+
+Starts benchmarks.mock_ollama, a throwaway MongoDB (a temporary mongod if one
+is on PATH, else mongomock-motor inside the server; or --mongodb-uri) and the real
+app via benchmarks.serve, each in its own process. It then runs closed-loop
+virtual users mixing /ask, /upload and /status at each concurrency level of
+the sweep, and reports throughput, latency percentiles, error and rejection
+(503) rates, worker-pool queueing sampled from /status, and queueing inside
+the mock Ollama.
+
+    python -m benchmarks.loadtest --users 10,50,200 --duration 30 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.pdfgen import VOCABULARY, page_lines, write_pdf
+from benchmarks.run import git_commit, percentiles
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="BillyBot HTTP load test")
+    parser.add_argument("--users", default="10,50,200", help="concurrency levels to sweep")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before each level")
+    parser.add_argument("--mix", default="ask=0.7,upload=0.1,status=0.2", help="operation weights")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between a user's requests")
+    parser.add_argument("--questions", type=int, default=500, help="distinct questions (fewer = more cache hits)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--kb-files", type=int, default=10)
+    parser.add_argument("--kb-pages", type=int, default=10)
+    parser.add_argument("--upload-pages", type=int, default=5)
+    parser.add_argument("--tokens", type=int, default=64, help="mock Ollama tokens per answer")
+    parser.add_argument("--first-token-ms", type=float, default=50.0)
+    parser.add_argument("--token-latency-ms", type=float, default=20.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=5.0)
+    parser.add_argument("--num-parallel", type=int, default=4, help="mock Ollama concurrent generations")
+    parser.add_argument("--mongodb-uri", help="use this MongoDB instead of a throwaway one")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="seconds between /status samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="loadtest-results.json")
+    return parser.parse_args(argv)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(check, timeout: float, what: str, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{what} exited with status {process.returncode}")
+        try:
+            if check():
+                return
+        except (OSError, httpx.HTTPError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {what}")
+
+
+def port_open(port: int) -> bool:
+    with socket.create_connection(("127.0.0.1", port), timeout=1):
+        return True
+
+
+class Services:
+    """
+    Starts and stops the mock Ollama, the throwaway MongoDB and the API server.
+    """
+
+    def __init__(self, args, workdir: str):
+        self.args = args
+        self.workdir = workdir
+        self.processes = []
+        self.ollama_url = None
+        self.api_url = None
+
+    def _spawn(self, name: str, command: list, env: dict = None):
+        log = open(os.path.join(self.workdir, f"{name}.log"), "w")
+        process = subprocess.Popen(
+            command, cwd=BACKEND_DIR, env={**os.environ, **(env or {})}, stdout=log, stderr=subprocess.STDOUT
+        )
+        self.processes.append((name, process, log))
+        return process
+
+    def log_tail(self, name: str, lines: int = 20) -> str:
+        with open(os.path.join(self.workdir, f"{name}.log")) as f:
+            return "".join(f.readlines()[-lines:])
+
+    def start(self):
+        args = self.args
+        ollama_port = free_port()
+        ollama = self._spawn("mock_ollama", [
+            sys.executable, "-m", "benchmarks.mock_ollama", "--port", str(ollama_port),
+            "--tokens", str(args.tokens), "--first-token-ms", str(args.first_token_ms),
+            "--token-latency-ms", str(args.token_latency_ms), "--embed-latency-ms", str(args.embed_latency_ms),
+            "--num-parallel", str(args.num_parallel),
+        ])
+        wait_for(lambda: port_open(ollama_port), 30, "mock Ollama", ollama)
+        self.ollama_url = f"http://127.0.0.1:{ollama_port}"
+
+        serve_args = []
+        mongodb_uri = args.mongodb_uri
+        if not mongodb_uri and shutil.which("mongod"):
+            mongo_port = free_port()
+            dbpath = os.path.join(self.workdir, "mongo")
+            os.makedirs(dbpath)
+            mongod = self._spawn("mongod", [
+                "mongod", "--dbpath", dbpath, "--port", str(mongo_port), "--bind_ip", "127.0.0.1", "--quiet",
+            ])
+            wait_for(lambda: port_open(mongo_port), 60, "mongod", mongod)
+            mongodb_uri = f"mongodb://127.0.0.1:{mongo_port}/"
+        elif not mongodb_uri:
+            serve_args.append("--mongomock")
+
+        api_port = free_port()
+        server = self._spawn("server", [
+            sys.executable, "-m", "benchmarks.serve", "--port", str(api_port), "--workdir", self.workdir,
+            "--kb-files", str(args.kb_files), "--kb-pages", str(args.kb_pages), *serve_args,
+        ], env={
+            "OLLAMA_BASE_URL": self.ollama_url,
+            "MONGODB_URI": mongodb_uri or "mongodb://127.0.0.1:1/",
+            "BILLYBOT_JOBS_DIR": os.path.join(self.workdir, "jobs"),
+            "BILLYBOT_EMBEDDING_CACHE": os.path.join(self.workdir, "embeddings.sqlite"),
+            "BILLYBOT_MANAGER_STATE": os.path.join(self.workdir, "manager.json"),
+        })
+        self.api_url = f"http://127.0.0.1:{api_port}"
+        try:
+            wait_for(lambda: httpx.get(f"{self.api_url}/ready").status_code == 200, 600, "API server", server)
+        except RuntimeError:
+            print(self.log_tail("server"), file=sys.stderr)
+            raise
+
+    def stop(self):
+        for _, process, log in reversed(self.processes):
+            if process.poll() is None:
+                process.send_signal(signal.SIGINT)
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            log.close()
+
+
+class Recorder:
+    def __init__(self):
+        self.measuring = False
+        self.samples = {}  # op -> [(seconds, status, error)]
+
+    def record(self, op: str, seconds: float, status: int, error: str):
+        if self.measuring:
+            self.samples.setdefault(op, []).append((seconds, status, error))
+
+
+async def run_level(args, api_url: str, ollama_url: str, users: int, token: str, pdf_bytes: bytes,
+                    questions: list) -> dict:
+    weights = dict((op, float(w)) for op, w in (item.split("=") for item in args.mix.split(",")))
+    ops, op_weights = list(weights), list(weights.values())
+    recorder = Recorder()
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=users + 8, max_keepalive_connections=users + 8)
+
+    async def ask(client, rng):
+        return await client.post("/ask", json={"question": rng.choice(questions), "settings": {"topK": 4}})
+
+    async def upload(client, rng):
+        files = {"file": ("policy.pdf", pdf_bytes, "application/pdf")}
+        return await client.post("/upload", params={"token": token}, files=files)
+
+    async def status(client, rng):
+        return await client.get("/status")
+
+    requests = {"ask": ask, "upload": upload, "status": status}
+
+    async def user(client, seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            op = rng.choices(ops, op_weights)[0]
+            start = time.perf_counter()
+            status_code, error = None, None
+            try:
+                response = await requests[op](client, rng)
+                status_code = response.status_code
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            recorder.record(op, time.perf_counter() - start, status_code, error)
+            if args.think_ms:
+                await asyncio.sleep(args.think_ms / 1000)
+
+    pool_samples = []
+
+    async def sample_pools(client):
+        while not stop.is_set():
+            try:
+                response = await client.get("/status")
+                if recorder.measuring:
+                    pool_samples.append(response.json()["pools"])
+            except (httpx.HTTPError, ValueError, KeyError):
+                pass
+            await asyncio.sleep(args.sample_interval)
+
+    async with httpx.AsyncClient(base_url=api_url, timeout=args.timeout, limits=limits) as client, \
+            httpx.AsyncClient(base_url=api_url, timeout=args.timeout) as sampler, \
+            httpx.AsyncClient(base_url=ollama_url, timeout=10) as ollama:
+        tasks = [asyncio.create_task(user(client, args.seed * 100003 + users * 1009 + i)) for i in range(users)]
+        tasks.append(asyncio.create_task(sample_pools(sampler)))
+        await asyncio.sleep(args.warmup)
+        await ollama.post("/mock/reset")
+        ollama_before = (await ollama.get("/mock/stats")).json()
+        recorder.measuring = True
+        start = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        recorder.measuring = False
+        elapsed = time.perf_counter() - start
+        ollama_after = (await ollama.get("/mock/stats")).json()
+        stop.set()
+        # In-flight requests finish (or time out) before the next level starts
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return summarize(users, elapsed, recorder.samples, pool_samples, ollama_before, ollama_after)
+
+
+def summarize(users: int, elapsed: float, samples: dict, pool_samples: list, ollama_before: dict,
+              ollama_after: dict) -> dict:
+    by_op = {}
+    total = errors = rejected = 0
+    for op, rows in sorted(samples.items()):
+        ok = [seconds for seconds, status, error in rows if error is None and status < 400]
+        op_rejected = sum(1 for _, status, _ in rows if status == 503)
+        op_errors = sum(1 for _, status, error in rows if error is not None or status >= 400)
+        by_op[op] = {
+            "requests": len(rows),
+            "throughput_rps": len(ok) / elapsed,
+            "error_rate": op_errors / len(rows),
+            "rejected": op_rejected,
+            "latency": percentiles(ok) if ok else None,
+            "status_codes": {str(code): sum(1 for _, s, _ in rows if s == code)
+                             for code in sorted({s for _, s, _ in rows if s is not None})},
+        }
+        total += len(rows)
+        errors += op_errors
+        rejected += op_rejected
+
+    queueing = {}
+    for sample in pool_samples:
+        for name, stats in sample.items():
+            pool = queueing.setdefault(name, {"max_queued": 0, "mean_queued": 0.0, "max_running": 0})
+            pool["max_queued"] = max(pool["max_queued"], stats["queued"])
+            pool["max_running"] = max(pool["max_running"], stats["running"])
+            pool["mean_queued"] += stats["queued"] / len(pool_samples)
+
+    ollama = {}
+    for gate in ("generation", "embedding"):
+        before, after = ollama_before[gate], ollama_after[gate]
+        completed = after["completed"] - before["completed"]
+        ollama[gate] = {
+            "completed": completed,
+            "max_active": after["max_active"],
+            "max_waiting": after["max_waiting"],
+            "mean_wait_ms": (after["wait_seconds"] - before["wait_seconds"]) / completed * 1000 if completed else 0.0,
+        }
+
+    return {
+        "users": users,
+        "duration_seconds": elapsed,
+        "requests": total,
+        "throughput_rps": sum(op["throughput_rps"] for op in by_op.values()),
+        "error_rate": errors / total if total else 0.0,
+        "rejected": rejected,
+        "ops": by_op,
+        "pools": queueing,
+        "ollama": ollama,
+    }
+
+
+def login(api_url: str) -> str:
+    credentials = {"email": f"loadtest-{os.getpid()}@example.com", "password": "loadtest"}
+    httpx.post(f"{api_url}/register", json=credentials, timeout=30)
+    response = httpx.post(f"{api_url}/login", json=credentials, timeout=30)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    levels = [int(u) for u in args.users.split(",") if u.strip()]
+    workdir = tempfile.mkdtemp(prefix="billybot-load-")
+    rng = random.Random(args.seed)
+    questions = [" ".join(rng.choice(VOCABULARY) for _ in range(8)) + "?" for _ in range(args.questions)]
+    pdf_path = os.path.join(workdir, "upload.pdf")
+    write_pdf(pdf_path, [page_lines(rng, 500) for _ in range(args.upload_pages)])
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+
+    services = Services(args, workdir)
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "cpu_count": os.cpu_count(),
+        "config": vars(args),
+        "levels": [],
+    }
+    try:
+        print("Starting mock Ollama, MongoDB and API server...")
+        services.start()
+        token = login(services.api_url)
+        for users in levels:
+            print(f"{users} users for {args.duration:.0f}s...")
+            level = asyncio.run(run_level(
+                args, services.api_url, services.ollama_url, users, token, pdf_bytes, questions
+            ))
+            results["levels"].append(level)
+            for op, stats in level["ops"].items():
+                latency = stats["latency"] or {}
+                print(f"  {op:<7} {stats['throughput_rps']:8.1f} req/s  p50 {latency.get('p50_ms', 0):8.1f} ms  "
+                      f"p99 {latency.get('p99_ms', 0):8.1f} ms  errors {stats['error_rate']:.1%}  "
+                      f"503s {stats['rejected']}")
+    finally:
+        services.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
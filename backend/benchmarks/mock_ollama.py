@@ -0,0 +1,246 @@
+# mock_ollama.py
+"""
+A local stand-in for the Ollama HTTP API, for load tests.
+
+Serves /api/generate, /api/chat (streamed as NDJSON or not), /api/embed,
+/api/embeddings and /api/tags with deterministic output. Generation waits
+--first-token-ms and then --token-latency-ms per token; at most --num-parallel
+generations run at once and the rest queue, like a single Ollama instance with
+OLLAMA_NUM_PARALLEL. GET /mock/stats reports concurrency and queueing,
+POST /mock/reset clears the peaks.
+
+    python -m benchmarks.mock_ollama --port 11435 --token-latency-ms 20 --num-parallel 4
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fakes import hashed_vector
+
+
+class Gate:
+    """
+    Bounded concurrency with counters for running and waiting requests.
+    """
+
+    def __init__(self, limit: int):
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.active = self.waiting = self.max_active = self.max_waiting = self.completed = 0
+        self.wait_seconds = 0.0
+
+    def __enter__(self):
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self.waiting += 1
+                self.max_waiting = max(self.max_waiting, self.waiting)
+            start = time.perf_counter()
+            self._semaphore.acquire()
+            with self._lock:
+                self.wait_seconds += time.perf_counter() - start
+                self.waiting -= 1
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.active -= 1
+            self.completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_active": self.max_active,
+                "max_waiting": self.max_waiting,
+                "completed": self.completed,
+                "wait_seconds": self.wait_seconds,
+            }
+
+    def reset_peaks(self):
+        with self._lock:
+            self.max_active, self.max_waiting = self.active, self.waiting
+
+
+class MockOllama:
+    def __init__(self, tokens: int = 64, first_token_ms: float = 50.0, token_latency_ms: float = 20.0,
+                 embed_latency_ms: float = 5.0, num_parallel: int = 4, embed_parallel: int = 8, dimensions: int = 768):
+        self.tokens = tokens
+        self.first_token_ms = first_token_ms
+        self.token_latency_ms = token_latency_ms
+        self.embed_latency_ms = embed_latency_ms
+        self.dimensions = dimensions
+        self.generation = Gate(num_parallel)
+        self.embedding = Gate(embed_parallel)
+
+    def generate(self, prompt: str):
+        """
+        Yields the generated tokens with the configured latencies.
+        """
+        words = (prompt.split("CONTEXT:", 1)[-1].split() or ["ok"])
+        with self.generation:
+            time.sleep(self.first_token_ms / 1000)
+            for i in range(self.tokens):
+                if i:
+                    time.sleep(self.token_latency_ms / 1000)
+                yield words[i % len(words)] + " "
+
+    def embed(self, texts: list) -> list:
+        with self.embedding:
+            time.sleep(self.embed_latency_ms / 1000)
+            return [hashed_vector(t, self.dimensions) for t in texts]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def make_handler(mock: MockOllama):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload: dict, status: int = 200):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_stream(self, lines):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for line in lines:
+                data = json.dumps(line).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json({"models": [
+                    {"name": name, "model": name, "modified_at": _now(), "size": 0, "digest": "mock"}
+                    for name in ("llama3:latest", "nomic-embed-text:latest")
+                ]})
+            elif self.path == "/api/version":
+                self._send_json({"version": "0.0.0-mock"})
+            elif self.path == "/mock/stats":
+                self._send_json({"generation": mock.generation.stats(), "embedding": mock.embedding.stats()})
+            elif self.path == "/":
+                self._send_json({"status": "Ollama is running"})
+            else:
+                self._send_json({"error": "not found"}, status=404)
+
+        def do_POST(self):
+            request = self._read_json()
+            model = request.get("model", "llama3")
+            if self.path in ("/api/generate", "/api/chat"):
+                chat = self.path == "/api/chat"
+                if chat:
+                    prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+                else:
+                    prompt = request.get("prompt", "")
+                start = time.perf_counter()
+
+                def piece(text: str, done: bool) -> dict:
+                    line = {"model": model, "created_at": _now(), "done": done}
+                    if chat:
+                        line["message"] = {"role": "assistant", "content": text}
+                    else:
+                        line["response"] = text
+                    if done:
+                        line.update({
+                            "done_reason": "stop",
+                            "total_duration": int((time.perf_counter() - start) * 1e9),
+                            "prompt_eval_count": len(prompt.split()),
+                            "eval_count": mock.tokens,
+                        })
+                    return line
+
+                if not chat and not prompt:
+                    # Like Ollama, a generate without a prompt only loads the model
+                    self._send_json(piece("", True))
+                elif request.get("stream", True):
+                    self._send_stream(_stream_pieces(mock.generate(prompt), piece))
+                else:
+                    self._send_json(piece("".join(mock.generate(prompt)), True))
+            elif self.path == "/api/embed":
+                texts = request.get("input", [])
+                texts = [texts] if isinstance(texts, str) else texts
+                self._send_json({"model": model, "embeddings": mock.embed(texts)})
+            elif self.path == "/api/embeddings":
+                self._send_json({"embedding": mock.embed([request.get("prompt", "")])[0]})
+            elif self.path in ("/api/show", "/api/pull"):
+                self._send_json({"status": "success", "modelfile": "", "parameters": "", "template": ""})
+            elif self.path == "/mock/reset":
+                mock.generation.reset_peaks()
+                mock.embedding.reset_peaks()
+                self._send_json({"status": "ok"})
+            else:
+                self._send_json({"error": "not found"}, status=404)
+
+    return Handler
+
+
+def _stream_pieces(tokens, piece):
+    for token in tokens:
+        yield piece(token, False)
+    yield piece("", True)
+
+
+def serve(mock: MockOllama, host: str = "127.0.0.1", port: int = 11435) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(mock))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Ollama server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--tokens", type=int, default=64, help="tokens generated per answer")
+    parser.add_argument("--first-token-ms", type=float, default=50.0)
+    parser.add_argument("--token-latency-ms", type=float, default=20.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=5.0)
+    parser.add_argument("--num-parallel", type=int, default=4, help="concurrent generations before queueing")
+    parser.add_argument("--embed-parallel", type=int, default=8)
+    parser.add_argument("--dimensions", type=int, default=768)
+    args = parser.parse_args(argv)
+
+    mock = MockOllama(
+        tokens=args.tokens,
+        first_token_ms=args.first_token_ms,
+        token_latency_ms=args.token_latency_ms,
+        embed_latency_ms=args.embed_latency_ms,
+        num_parallel=args.num_parallel,
+        embed_parallel=args.embed_parallel,
+        dimensions=args.dimensions,
+    )
+    server = serve(mock, args.host, args.port)
+    print(f"Mock Ollama listening on http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
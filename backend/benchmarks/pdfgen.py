@@ -0,0 +1,83 @@
+# pdfgen.py
+"""
+Writes synthetic text PDFs without any PDF library.
+
+Pages hold deterministic pseudo-random prose drawn from a fixed vocabulary,
+laid out as plain Helvetica text lines that pypdf extracts like a real
+text-based policy document.
+"""
+import os
+import random
+
+
+VOCABULARY = (
+    "policy employee manager approval request leave travel expense reimbursement receipt "
+    "security access device password account data privacy retention record audit "
+    "compliance training benefit insurance payroll holiday schedule overtime remote office "
+    "contract vendor purchase invoice budget department review quarter annual report "
+    "incident response escalation support ticket customer service quality standard procedure "
+    "must should may within days weeks business written notice submit complete required "
+    "the a of to and for in on with by is are be will all any each before after"
+).split()
+
+WORDS_PER_LINE = 12
+LINES_PER_PAGE = 55
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def page_lines(rng: random.Random, words_per_page: int) -> list:
+    words = [rng.choice(VOCABULARY) for _ in range(words_per_page)]
+    lines = [" ".join(words[i:i + WORDS_PER_LINE]) for i in range(0, len(words), WORDS_PER_LINE)]
+    return lines[:LINES_PER_PAGE]
+
+
+def write_pdf(path: str, pages: list):
+    """
+    Writes a PDF with one page per entry of `pages` (each a list of text lines).
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for lines in pages:
+        body = "BT /F1 10 Tf 12 TL 50 770 Td\n" + "".join(f"({_escape(line)}) Tj T*\n" for line in lines) + "ET"
+        stream = body.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_corpus(directory: str, files: int, pages: int, words_per_page: int = 500, seed: int = 0) -> list:
+    """
+    Writes `files` PDFs of `pages` pages each into directory and returns their paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"synthetic_{i:04d}.pdf")
+        write_pdf(path, [page_lines(rng, words_per_page) for _ in range(pages)])
+        paths.append(path)
+    return paths
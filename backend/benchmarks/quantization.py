@@ -0,0 +1,165 @@
+# quantization.py
+"""
+Recall versus memory for the FAISS backend's quantization options.
+
+Builds one collection per index type and quantization over the same synthetic
+chunks (topic-clustered text embedded with the deterministic fake embeddings),
+then compares each against exact search over the full-precision vectors:
+recall@k of the returned chunks, search latency, and the size of the index,
+which is what has to stay in memory; the vector file is memory-mapped and
+only read to rescore candidates. Quantized indexes are measured at each
+--rescore-factors value (1 = no extra candidates).
+
+    python -m benchmarks.quantization --chunks 100000 --indexes flat,hnsw --quantizations none,sq8,pq
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.fakes import FakeEmbeddings
+from benchmarks.pdfgen import VOCABULARY
+from benchmarks.run import git_commit, percentiles
+
+SCHEMA_VERSION = 1
+FILL_BATCH_SIZE = 1000
+CHUNKS_PER_TOPIC = 50
+TERMS_PER_TOPIC = 40
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="FAISS quantization recall and memory report")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--words-per-chunk", type=int, default=140)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--dimensions", type=int, default=768, help="fake embedding dimensions")
+    parser.add_argument("--indexes", default="flat,hnsw", help="FAISS index types to measure")
+    parser.add_argument("--quantizations", default="none,sq8,pq")
+    parser.add_argument("--rescore-factors", default="1,8", help="candidates per result rescored at full precision")
+    parser.add_argument("--dtype", default="float32", help="stored vector dtype")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="keep the collections here instead of a temp dir")
+    parser.add_argument("--output", default="quantization-results.json")
+    return parser.parse_args(argv)
+
+
+def topic_text(rng: random.Random, topic: int, words: int) -> str:
+    """
+    Mostly words from the topic's own terms, the rest shared vocabulary, so
+    chunks of one topic are neighbours the way sections of one policy are.
+    """
+    return " ".join(
+        f"t{topic}w{rng.randrange(TERMS_PER_TOPIC)}" if rng.random() < 0.7 else rng.choice(VOCABULARY)
+        for _ in range(words)
+    )
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def measure(args, workdir: str, index_type: str, quantization: str, texts: list, vectors: np.ndarray,
+            queries: np.ndarray, truth: np.ndarray) -> list:
+    import faiss_store
+
+    directory = os.path.join(workdir, f"{index_type}_{quantization}")
+    start = time.perf_counter()
+    collection = faiss_store.FaissCollection(directory, index_type, args.dtype, quantization)
+    for offset in range(0, len(texts), FILL_BATCH_SIZE):
+        collection.upsert(
+            ids=[str(i) for i in range(offset, min(offset + FILL_BATCH_SIZE, len(texts)))],
+            embeddings=vectors[offset:offset + FILL_BATCH_SIZE],
+            documents=texts[offset:offset + FILL_BATCH_SIZE],
+        )
+    collection.persist()
+    build_seconds = time.perf_counter() - start
+    del collection
+    # Reopen so the index is read back the way a restarted server reads it
+    collection = faiss_store.FaissCollection(directory, index_type, args.dtype, quantization)
+    index_bytes = os.path.getsize(collection._index_path())
+    vector_file_bytes = os.path.getsize(collection._vectors_path())
+
+    factors = [1] if collection._index_codec == "none" else [int(f) for f in args.rescore_factors.split(",")]
+    results = []
+    for factor in factors:
+        faiss_store.RESCORE_FACTOR = factor
+        collection.query(queries[:5], n_results=args.top_k)
+        found, samples = [], []
+        for query in queries:
+            start = time.perf_counter()
+            result = collection.query([query], n_results=args.top_k, include=[])
+            samples.append(time.perf_counter() - start)
+            found.append({int(chunk_id) for chunk_id in result["ids"][0]})
+        recall = sum(len(f & set(t.tolist())) for f, t in zip(found, truth)) / (len(queries) * args.top_k)
+        results.append({
+            "index": index_type,
+            "quantization": quantization,
+            "codec": collection._index_codec,
+            "rescore_factor": factor if collection._index_codec != "none" else None,
+            "recall_at_k": recall,
+            "index_bytes": index_bytes,
+            "index_bytes_per_chunk": index_bytes / len(texts),
+            "vector_file_bytes": vector_file_bytes,
+            "build_seconds": build_seconds,
+            "search": percentiles(samples),
+        })
+    collection.drop()
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="billybot-quant-")
+    os.makedirs(workdir, exist_ok=True)
+
+    rng = random.Random(args.seed)
+    topics = max(1, args.chunks // CHUNKS_PER_TOPIC)
+    texts = [topic_text(rng, rng.randrange(topics), args.words_per_chunk) for _ in range(args.chunks)]
+    questions = [topic_text(rng, rng.randrange(topics), 8) for _ in range(args.queries)]
+    embeddings = FakeEmbeddings(dimensions=args.dimensions)
+    print(f"Embedding {args.chunks} chunks...")
+    vectors = np.array(embeddings.embed_documents(texts), dtype=np.float32)
+    queries = np.array(embeddings.embed_documents(questions), dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    truth = exact_top_k(vectors, queries, args.top_k)
+
+    results = {
+        "schema": SCHEMA_VERSION,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "chunks": args.chunks,
+        "full_precision_bytes": int(vectors.nbytes),
+        "results": [],
+    }
+    try:
+        for index_type in [i for i in args.indexes.split(",") if i]:
+            for quantization in [q for q in args.quantizations.split(",") if q]:
+                print(f"Building {index_type} / {quantization}...")
+                results["results"] += measure(args, workdir, index_type, quantization, texts, vectors, queries, truth)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"{'index':<6} {'codes':<6} {'rescore':>7} {'recall@' + str(args.top_k):>9} {'index MB':>9} "
+          f"{'x smaller':>9} {'p50 ms':>7} {'p95 ms':>7}")
+    for r in results["results"]:
+        print(f"{r['index']:<6} {r['codec']:<6} {r['rescore_factor'] or '-':>7} {r['recall_at_k']:>9.3f} "
+              f"{r['index_bytes'] / 2 ** 20:>9.1f} {results['full_precision_bytes'] / r['index_bytes']:>9.1f} "
+              f"{r['search']['p50_ms']:>7.2f} {r['search']['p95_ms']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# run.py
+"""
+Runs the offline benchmarks and writes the results as JSON.
+
+Ingestion: generates synthetic PDFs and times VectorStoreManager.ingest_pdfs
+(pages/sec, chunks/sec), then a re-ingest of the same files (all skipped).
+Retrieval: fills a collection with N synthetic chunks per size and reports
+p50/p95/p99 similarity_search and answer_question latency.
+
+    python -m benchmarks.run --files 20 --pages 10 --sizes 1000,10000,100000 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fakes import FakeEmbeddings, FakeLLM, install_fakes
+from benchmarks.pdfgen import VOCABULARY, generate_corpus
+
+SCHEMA_VERSION = 1
+FILL_BATCH_SIZE = 1000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="BillyBot offline benchmarks")
+    parser.add_argument("--files", type=int, default=20, help="synthetic PDFs to ingest")
+    parser.add_argument("--pages", type=int, default=10, help="pages per PDF")
+    parser.add_argument("--words-per-page", type=int, default=500)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=150)
+    parser.add_argument("--serial", action="store_true", help="parse PDFs in-process instead of a process pool")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="collection sizes (chunks) for retrieval")
+    parser.add_argument("--queries", type=int, default=200, help="timed similarity searches per size")
+    parser.add_argument("--answer-queries", type=int, default=50, help="timed answer_question calls per size")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--dimensions", type=int, default=768, help="fake embedding dimensions")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="simulated latency per embedding call")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated latency per LLM call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-ingest", action="store_true")
+    parser.add_argument("--skip-retrieval", action="store_true")
+    parser.add_argument("--workdir", help="keep generated PDFs and databases here instead of a temp dir")
+    parser.add_argument("--output", default="benchmark-results.json")
+    return parser.parse_args(argv)
+
+
+def peak_rss_mb() -> dict:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1000
+
+    return {
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "samples": len(ordered),
+    }
+
+
+def stage_totals(before: dict, after: dict) -> dict:
+    """
+    Per-stage count and total time recorded between two STAGE_SECONDS summaries.
+    """
+    totals = {}
+    for key, (count, seconds) in after.items():
+        prev_count, prev_seconds = before.get(key, (0, 0.0))
+        if count > prev_count:
+            totals[key[0]] = {"count": count - prev_count, "total_ms": (seconds - prev_seconds) * 1000}
+    return totals
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def random_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def bench_ingest(args, workdir: str, fake_embeddings: FakeEmbeddings) -> dict:
+    from metrics import STAGE_SECONDS
+    from vector_store import VectorStoreManager, invalidate_collections
+
+    start = time.perf_counter()
+    paths = generate_corpus(
+        os.path.join(workdir, "pdfs"), args.files, args.pages, args.words_per_page, seed=args.seed
+    )
+    generate_seconds = time.perf_counter() - start
+
+    manager = VectorStoreManager(
+        persist_directory=os.path.join(workdir, "ingest_db"),
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+    )
+    stages_before = STAGE_SECONDS.summary()
+    calls_before = fake_embeddings.calls
+    report = {}
+    start = time.perf_counter()
+    manager.ingest_pdfs(paths, parallel=not args.serial, report=report)
+    seconds = time.perf_counter() - start
+    stages = stage_totals(stages_before, STAGE_SECONDS.summary())
+
+    start = time.perf_counter()
+    manager.ingest_pdfs(paths, parallel=not args.serial, report={})
+    reingest_seconds = time.perf_counter() - start
+    invalidate_collections(manager.persist_directory)
+
+    pages = args.files * args.pages
+    return {
+        "files": args.files,
+        "pages": pages,
+        "chunks": report["chunks"],
+        "failed_files": len(report["failed"]),
+        "embed_calls": fake_embeddings.calls - calls_before,
+        "generate_pdfs_seconds": generate_seconds,
+        "ingest_seconds": seconds,
+        "reingest_seconds": reingest_seconds,
+        "pages_per_sec": pages / seconds,
+        "chunks_per_sec": report["chunks"] / seconds,
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def fill_collection(db, size: int, words_per_chunk: int, rng: random.Random, fake_embeddings: FakeEmbeddings):
+    """
+    Writes `size` synthetic chunks straight into the collection in batches, so
+    large sizes don't need a matching PDF corpus.
+    """
+    for offset in range(0, size, FILL_BATCH_SIZE):
+        count = min(FILL_BATCH_SIZE, size - offset)
+        texts = [random_text(rng, words_per_chunk) for _ in range(count)]
+        db._collection.upsert(
+            ids=[f"bench-{offset + i}" for i in range(count)],
+            embeddings=fake_embeddings.embed_documents(texts),
+            documents=texts,
+            metadatas=[{"source": f"synthetic_{(offset + i) // 100:04d}.pdf", "page": (offset + i) % 100}
+                       for i in range(count)],
+        )
+
+
+def bench_retrieval(args, workdir: str, size: int, fake_embeddings: FakeEmbeddings) -> dict:
+    from chatbot import answer_question
+    from vector_store import VectorStoreManager, invalidate_collections
+
+    rng = random.Random(args.seed + size)
+    persist_directory = os.path.join(workdir, f"search_db_{size}")
+    manager = VectorStoreManager(
+        persist_directory=persist_directory,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        collection_name="benchmark",
+    )
+    db = manager.load_chroma()
+
+    start = time.perf_counter()
+    # ~7 characters per word including the space, so chunks match chunk_size
+    fill_collection(db, size, max(args.chunk_size // 7, 1), rng, fake_embeddings)
+    fill_seconds = time.perf_counter() - start
+
+    questions = [random_text(rng, 8) for _ in range(args.queries)]
+    for question in questions[:5]:
+        db.similarity_search(question, k=args.top_k)
+
+    search_samples = []
+    for question in questions:
+        start = time.perf_counter()
+        db.similarity_search(question, k=args.top_k)
+        search_samples.append(time.perf_counter() - start)
+
+    answer_samples = []
+    for question in questions[:args.answer_queries]:
+        start = time.perf_counter()
+        answer_question(question, db, top_k=args.top_k)
+        answer_samples.append(time.perf_counter() - start)
+
+    result = {
+        "chunks": size,
+        "fill_seconds": fill_seconds,
+        "fill_chunks_per_sec": size / fill_seconds,
+        "similarity_search": percentiles(search_samples),
+        "answer_question": percentiles(answer_samples) if answer_samples else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    invalidate_collections(persist_directory)
+    shutil.rmtree(persist_directory, ignore_errors=True)
+    return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    workdir = args.workdir or tempfile.mkdtemp(prefix="billybot-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    # A fresh embedding cache per run, so every chunk really goes through the embedder
+    os.environ["BILLYBOT_EMBEDDING_CACHE"] = os.path.join(workdir, "embeddings.sqlite")
+
+    import vector_store
+
+    embedding_model = "nomic-embed-text"
+    fake_embeddings = FakeEmbeddings(dimensions=args.dimensions, latency_ms=args.embed_latency_ms)
+    install_fakes(embedding_model, "llama3", fake_embeddings, FakeLLM(latency_ms=args.llm_latency_ms))
+
+    results = {
+        "schema": SCHEMA_VERSION,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ingest_workers": vector_store.INGEST_WORKERS,
+        "config": vars(args),
+        "ingest": None,
+        "retrieval": {},
+    }
+    try:
+        if not args.skip_ingest:
+            print(f"Ingesting {args.files} PDFs x {args.pages} pages...")
+            results["ingest"] = bench_ingest(args, workdir, fake_embeddings)
+            ingest = results["ingest"]
+            print(f"  {ingest['pages_per_sec']:.1f} pages/sec, {ingest['chunks_per_sec']:.1f} chunks/sec")
+        if not args.skip_retrieval:
+            for size in sizes:
+                print(f"Searching {size} chunks...")
+                results["retrieval"][str(size)] = result = bench_retrieval(args, workdir, size, fake_embeddings)
+                search = result["similarity_search"]
+                print(f"  similarity_search p50 {search['p50_ms']:.2f} ms, "
+                      f"p95 {search['p95_ms']:.2f} ms, p99 {search['p99_ms']:.2f} ms")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Peak RSS {results['peak_rss_mb']['self']:.0f} MB (parse workers {results['peak_rss_mb']['children']:.0f} MB)")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# serve.py
+"""
+Starts the real FastAPI app (main.app) for load tests, with a knowledge base
+already ingested so /ask has something to answer from.
+
+The knowledge base is ingested in-process before the server starts, through
+the same VectorStoreManager the upload path uses; point OLLAMA_BASE_URL at
+benchmarks.mock_ollama and MONGODB_URI at a throwaway mongod first. With
+--mongomock, the app's Mongo client is an in-memory mongomock-motor client instead.
+
+    python -m benchmarks.serve --port 8100 --workdir /tmp/billybot-load
+"""
+import argparse
+import os
+
+import uvicorn
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the BillyBot API with a preloaded knowledge base")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--workdir", required=True)
+    parser.add_argument("--kb-files", type=int, default=10)
+    parser.add_argument("--kb-pages", type=int, default=10)
+    parser.add_argument("--mongomock", action="store_true")
+    args = parser.parse_args(argv)
+
+    import main as api
+    from benchmarks.pdfgen import generate_corpus
+
+    if args.mongomock:
+        from mongomock_motor import AsyncMongoMockClient
+
+        # The lifespan builds the client, so swap the class it constructs
+        api.AsyncIOMotorClient = lambda *a, **kw: AsyncMongoMockClient()
+
+    manager = api.get_manager({"persistDir": os.path.join(args.workdir, "chroma_kb_db")})
+    paths = generate_corpus(os.path.join(args.workdir, "kb_pdfs"), args.kb_files, args.kb_pages)
+    report = {}
+    manager.ingest_pdfs(paths, report=report)
+    api.manager = manager
+    print(f"Knowledge base ready: {report['chunks']} chunks from {args.kb_files} files", flush=True)
+
+    uvicorn.run(api.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
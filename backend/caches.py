@@ -0,0 +1,184 @@
+# caches.py
+"""
+In-memory caches with LRU and TTL eviction.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLLRUCache:
+    """
+    Thread-safe mapping capped at max_entries (least recently used evicted first)
+    whose entries expire ttl seconds after they were set.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def items(self) -> list:
+        """
+        Returns the live (key, value) pairs, most recently used last.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [(k, v) for k, (expires_at, v) in self._data.items() if expires_at > now]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class SemanticAnswerCache:
+    """
+    Answers keyed by the question's embedding: a lookup returns the stored
+    answer whose question embedding has cosine similarity >= threshold with the
+    new one, among entries stored under the same scope (collection version and
+    generation settings).
+
+    Unit vectors are kept per scope and stacked into a float32 matrix, so a
+    lookup scores every entry of its scope with one matrix product. numpy is
+    imported on first use to keep it out of the API's import time.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600, threshold: float = 0.95):
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._entries = TTLLRUCache(max_entries=max_entries, ttl=ttl)
+        # scope -> [{question: unit vector}, questions, matrix]; questions and
+        # matrix are rebuilt after a store. Rows can outlive their (evicted)
+        # entries until the next prune.
+        self._index = {}
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, scope, question: str, vector: list):
+        return self.lookup_many(scope, [question], [vector])[0]
+
+    def lookup_many(self, scope, questions: list, vectors: list) -> list:
+        """
+        lookup for several questions under one scope, with one matrix product
+        for all of them. Returns the cached value or None per question, in order.
+        """
+        values = [self._entries.get((scope, question)) for question in questions]
+        pending = [i for i, value in enumerate(values) if value is None]
+        if pending:
+            for i, value in zip(pending, self._nearest(scope, [vectors[i] for i in pending])):
+                values[i] = value
+        hits = sum(value is not None for value in values)
+        self.hits += hits
+        self.misses += len(values) - hits
+        return values
+
+    def _nearest(self, scope, vectors: list) -> list:
+        import numpy as np
+
+        with self._lock:
+            bucket = self._index.get(scope)
+            if bucket is None:
+                return [None] * len(vectors)
+            if bucket[2] is None:
+                bucket[1] = list(bucket[0])
+                bucket[2] = np.stack(list(bucket[0].values()))
+            questions, matrix = bucket[1], bucket[2]
+
+        scores = _unit_rows(np.asarray(vectors, dtype=np.float32)) @ matrix.T
+        found = []
+        for row in scores:
+            value = None
+            candidates = np.flatnonzero(row >= self.threshold)
+            for j in candidates[np.argsort(-row[candidates])]:
+                value = self._entries.get((scope, questions[j]))
+                if value is not None:
+                    break
+            found.append(value)
+        return found
+
+    def store(self, scope, question: str, vector: list, value):
+        import numpy as np
+
+        unit = _unit_rows(np.asarray([vector], dtype=np.float32))[0]
+        self._entries.set((scope, question), value)
+        with self._lock:
+            bucket = self._index.setdefault(scope, [{}, None, None])
+            if question not in bucket[0]:
+                self._rows += 1
+            bucket[0][question] = unit
+            bucket[1] = bucket[2] = None
+            if self._rows > 2 * self._entries.max_entries:
+                self._prune()
+
+    def _prune(self):
+        """Drops rows whose entries were evicted or expired, and empty scopes."""
+        live = {key for key, _ in self._entries.items()}
+        index = {}
+        for scope, bucket in self._index.items():
+            units = {q: unit for q, unit in bucket[0].items() if (scope, q) in live}
+            if units:
+                index[scope] = [units, None, None]
+        self._index = index
+        self._rows = sum(len(bucket[0]) for bucket in index.values())
+
+    def clear(self):
+        self._entries.clear()
+        with self._lock:
+            self._index.clear()
+            self._rows = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            **self._entries.stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+def _unit_rows(matrix):
+    import numpy as np
+
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
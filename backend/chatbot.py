@@ -1,18 +1,124 @@
 # chatbot.py
-from langchain_ollama import OllamaLLM
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from caches import SemanticAnswerCache, TTLLRUCache
+from clients import get_llm, model_slot
+from metrics import ERRORS, TOKENS, observe_stage, stage
 
 SYSTEM_INSTRUCTION = (
     "You are an internal knowledge base assistant. Answer concisely using ONLY the provided policy "
     "context. If the answer is not in the context, say you don't know and suggest uploading more relevant documents."
 )
 
-def build_prompt(question: str, docs: list) -> str:
-    context_pieces = []
-    for i, d in enumerate(docs, start=1):
-        src = d.metadata.get("source", f"doc{i}")
-        context_pieces.append(f"[{src}]\n{d.page_content}")
-    context = "\n\n---\n\n".join(context_pieces)
-    print(context)  # Debug: Print the constructed context
+# Repeated questions skip work: query embeddings are memoized in an LRU, and an
+# answer is reused when a new question embeds close enough to a cached one.
+# Both are keyed by collection version, so any ingest or clear invalidates them.
+query_embedding_cache = TTLLRUCache(
+    max_entries=int(os.getenv("BILLYBOT_QUERY_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("BILLYBOT_QUERY_CACHE_TTL", "3600")),
+)
+answer_cache = SemanticAnswerCache(
+    max_entries=int(os.getenv("BILLYBOT_ANSWER_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("BILLYBOT_ANSWER_CACHE_TTL", "3600")),
+    threshold=float(os.getenv("BILLYBOT_ANSWER_CACHE_SIMILARITY", "0.95")),
+)
+
+# Rough token estimate for llama-family tokenizers on English text (~4 chars per token).
+CHARS_PER_TOKEN = 4
+CONTEXT_TOKEN_BUDGET = int(os.getenv("BILLYBOT_CONTEXT_TOKEN_BUDGET", "1500"))
+MIN_MERGE_OVERLAP = 20
+
+# Answers generated at once by answer_questions (and /ask/batch by default)
+BATCH_CONCURRENCY = int(os.getenv("BILLYBOT_BATCH_CONCURRENCY", "4"))
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _merge_overlapping(first: str, second: str):
+    """
+    Returns first and second joined on their shared span when one contains the
+    other or the end of first overlaps the start of second, else None.
+    """
+    if second in first:
+        return first
+    if first in second:
+        return second
+    probe = second[:MIN_MERGE_OVERLAP]
+    start = first.find(probe)
+    while start != -1:
+        tail = first[start:]
+        if second.startswith(tail):
+            return first + second[len(tail):]
+        start = first.find(probe, start + 1)
+    return None
+
+
+def pack_context(docs: list, token_budget: int = CONTEXT_TOKEN_BUDGET) -> tuple:
+    """
+    Merges overlapping chunks from the same source and page into single passages
+    (dropping duplicated spans), then fills token_budget with passages in
+    relevance order. Returns (passages, stats) where passages are (source, text)
+    pairs and stats reports chunk and token counts, including tokens saved.
+    """
+    passages = []  # [source, page, text] in order of best-ranked member
+    for d in docs:
+        source, page = d.metadata.get("source"), d.metadata.get("page")
+        text = d.page_content.strip()
+        for passage in passages:
+            if passage[0] != source or passage[1] != page:
+                continue
+            merged = _merge_overlapping(passage[2], text) or _merge_overlapping(text, passage[2])
+            if merged is not None:
+                passage[2] = merged
+                break
+        else:
+            passages.append([source, page, text])
+
+    packed, used, dropped = [], 0, 0
+    for source, _, text in passages:
+        tokens = estimate_tokens(text)
+        remaining = token_budget - used
+        if tokens > remaining:
+            if packed or remaining <= 0:
+                dropped += 1
+                continue
+            # Always keep (the start of) the most relevant passage
+            text = text[:remaining * CHARS_PER_TOKEN]
+            tokens = estimate_tokens(text)
+        packed.append((source, text))
+        used += tokens
+
+    raw_tokens = sum(estimate_tokens(d.page_content) for d in docs)
+    stats = {
+        "chunks": len(docs),
+        "passages": len(packed),
+        "dropped_passages": dropped,
+        "raw_tokens": raw_tokens,
+        "context_tokens": used,
+        "tokens_saved": raw_tokens - used,
+    }
+    return packed, stats
+
+
+def build_prompt(question: str, docs: list, token_budget: int = CONTEXT_TOKEN_BUDGET, stats: dict = None) -> str:
+    """
+    Builds the prompt from the packed context. Pass a dict as `stats` to receive
+    the packing statistics from pack_context.
+    """
+    with stage("prompt_build"):
+        passages, packing = pack_context(docs, token_budget)
+        context_pieces = []
+        for i, (src, text) in enumerate(passages, start=1):
+            context_pieces.append(f"[{src or f'doc{i}'}]\n{text}")
+        context = "\n\n---\n\n".join(context_pieces)
+    if stats is not None:
+        stats.update(packing)
+    TOKENS.inc(packing["context_tokens"], kind="context")
+    TOKENS.inc(packing["tokens_saved"], kind="context_saved")
     prompt = (
         f"{SYSTEM_INSTRUCTION}\n\n"
         f"CONTEXT:\n{context}\n\n"
@@ -22,11 +128,268 @@ def build_prompt(question: str, docs: list) -> str:
     return prompt
 
 
-def answer_question(question: str, chroma_db, top_k: int = 4, model: str = "llama3", temperature: float = 0.0):
-    docs = chroma_db.similarity_search(question, k=top_k)
+def embed_question(question: str, chroma_db, collection_version=None) -> list:
+    if collection_version is None:
+        with stage("query_embedding"):
+            return chroma_db.embeddings.embed_query(question)
+    key = (collection_version, question)
+    vector = query_embedding_cache.get(key)
+    if vector is None:
+        with stage("query_embedding"):
+            vector = chroma_db.embeddings.embed_query(question)
+        query_embedding_cache.set(key, vector)
+    return vector
+
+
+def retrieve(question: str, chroma_db, top_k: int = 4, collection_version=None) -> list:
+    if collection_version is None:
+        # Embeds the question internally, so this stage includes the query embedding
+        with stage("similarity_search"):
+            return chroma_db.similarity_search(question, k=top_k)
+    vector = embed_question(question, chroma_db, collection_version)
+    with stage("similarity_search"):
+        return chroma_db.similarity_search_by_vector(vector, k=top_k)
+
+
+def embed_questions(questions: list, chroma_db, collection_version=None) -> list:
+    """
+    embed_question for many questions: the ones not in the query LRU are
+    embedded together in a single call.
+    """
+    vectors = {}
+    if collection_version is not None:
+        for question in dict.fromkeys(questions):
+            vector = query_embedding_cache.get((collection_version, question))
+            if vector is not None:
+                vectors[question] = vector
+    missing = [q for q in dict.fromkeys(questions) if q not in vectors]
+    if missing:
+        with stage("query_embedding"):
+            computed = chroma_db.embeddings.embed_queries(missing)
+        for question, vector in zip(missing, computed):
+            vectors[question] = vector
+            if collection_version is not None:
+                query_embedding_cache.set((collection_version, question), vector)
+    return [vectors[q] for q in questions]
+
+
+def retrieve_many(questions: list, chroma_db, top_k: int = 4, collection_version=None) -> list:
+    """
+    retrieve for many questions with one embedding call and one bulk vector
+    query. Returns a list of documents per question, in order.
+    """
+    from langchain_core.documents import Document
+
+    vectors = embed_questions(questions, chroma_db, collection_version)
+    with stage("similarity_search"):
+        result = chroma_db._collection.query(
+            query_embeddings=vectors, n_results=top_k, include=["documents", "metadatas"]
+        )
+    return [
+        [Document(page_content=text, metadata=metadata or {}) for text, metadata in zip(texts, metadatas)]
+        for texts, metadatas in zip(result["documents"], result["metadatas"])
+    ]
+
+
+def sources(docs: list) -> list:
+    return [{"source": d.metadata.get("source"), "page": d.metadata.get("page")} for d in docs]
+
+
+def cached_answer(question: str, chroma_db, collection_version, top_k: int = 4, model: str = "llama3",
+                  temperature: float = 0.0):
+    """
+    Returns {"answer", "sources"} for a semantically equivalent cached question, or None.
+    """
+    if collection_version is None:
+        return None
+    vector = embed_question(question, chroma_db, collection_version)
+    return answer_cache.lookup((collection_version, top_k, model, temperature), question, vector)
+
+
+def cached_answers(questions: list, chroma_db, collection_version, top_k: int = 4, model: str = "llama3",
+                   temperature: float = 0.0) -> list:
+    """
+    cached_answer for many questions: memoized embeddings and one vectorized
+    answer-cache lookup. Returns a hit or None per question, in order.
+    """
+    if collection_version is None:
+        return [None] * len(questions)
+    vectors = embed_questions(questions, chroma_db, collection_version)
+    return answer_cache.lookup_many((collection_version, top_k, model, temperature), questions, vectors)
+
+
+def remember_answer(question: str, answer: str, docs: list, collection_version, top_k: int = 4,
+                    model: str = "llama3", temperature: float = 0.0):
+    """
+    Stores an answer for cached_answer. Uses the memoized query embedding, so this
+    never calls the embedding model; nothing is stored if it has been evicted.
+    """
+    vector = query_embedding_cache.get((collection_version, question)) if collection_version is not None else None
+    if vector is None or not docs:
+        return
+    answer_cache.store(
+        (collection_version, top_k, model, temperature),
+        question,
+        vector,
+        {"answer": answer, "sources": sources(docs)},
+    )
+
+
+def generate_answer(question: str, docs: list, model: str = "llama3", temperature: float = 0.0) -> str:
     if not docs:
         return "No relevant documents found in the knowledge base."
 
     prompt = build_prompt(question, docs)
-    llm = OllamaLLM(model=model, temperature=temperature)
-    return llm.invoke(prompt)
+    llm = get_llm(model=model, temperature=temperature)
+    with model_slot(model), stage("llm_generate"):
+        answer = llm.invoke(prompt)
+    TOKENS.inc(estimate_tokens(answer), kind="generated")
+    return answer
+
+
+def answer_question(question: str, chroma_db, top_k: int = 4, model: str = "llama3", temperature: float = 0.0,
+                    collection_version=None):
+    """
+    Retrieves context and answers the question. Pass the collection's version
+    (VectorStoreManager.collection_version()) to enable the query and answer caches.
+    """
+    hit = cached_answer(question, chroma_db, collection_version, top_k=top_k, model=model, temperature=temperature)
+    if hit is not None:
+        return hit["answer"]
+    docs = retrieve(question, chroma_db, top_k=top_k, collection_version=collection_version)
+    answer = generate_answer(question, docs, model=model, temperature=temperature)
+    remember_answer(question, answer, docs, collection_version, top_k=top_k, model=model, temperature=temperature)
+    return answer
+
+
+def prepare_batch(questions: list, chroma_db, top_k: int = 4, model: str = "llama3", temperature: float = 0.0,
+                  collection_version=None) -> list:
+    """
+    First step of answer_questions: bulk retrieval and answer-cache lookups.
+    Returns one item per question, in order, holding either a cached answer,
+    an error, or the retrieved `docs` still to be answered by generate_item.
+    """
+    items = [
+        {"question": q, "answer": None, "sources": [], "cached": False, "error": None, "docs": None, "timings": {}}
+        for q in questions
+    ]
+    valid = []
+    for item in items:
+        if isinstance(item["question"], str) and item["question"].strip():
+            valid.append(item)
+        else:
+            item["error"] = "Question is required"
+    if not valid:
+        return items
+
+    start = time.perf_counter()
+    try:
+        retrieved = retrieve_many([item["question"] for item in valid], chroma_db, top_k, collection_version)
+    except Exception as e:
+        ERRORS.inc(where="batch_retrieval")
+        for item in valid:
+            item["error"] = f"Retrieval failed: {str(e)}"
+        return items
+    retrieval_ms = (time.perf_counter() - start) * 1000
+
+    hits = cached_answers([item["question"] for item in valid], chroma_db, collection_version, top_k=top_k,
+                          model=model, temperature=temperature)
+    for item, docs, hit in zip(valid, retrieved, hits):
+        item["timings"]["retrieval_ms"] = retrieval_ms
+        if hit is not None:
+            item.update(answer=hit["answer"], sources=hit["sources"], cached=True)
+        else:
+            item["docs"] = docs
+            item["sources"] = sources(docs)
+    return items
+
+
+def generate_item(item: dict, model: str = "llama3", temperature: float = 0.0):
+    """
+    Answers one prepared batch item in place, recording its error instead of raising.
+    """
+    start = time.perf_counter()
+    try:
+        item["answer"] = generate_answer(item["question"], item["docs"], model=model, temperature=temperature)
+    except Exception as e:
+        ERRORS.inc(where="batch_generation")
+        item["error"] = f"Generation failed: {str(e)}"
+    item["timings"]["generation_ms"] = (time.perf_counter() - start) * 1000
+
+
+def finish_batch(items: list, collection_version=None, top_k: int = 4, model: str = "llama3",
+                 temperature: float = 0.0) -> list:
+    """
+    Caches the newly generated answers and returns the items without their documents.
+    """
+    for item in items:
+        docs = item.pop("docs")
+        if docs is not None and item["error"] is None:
+            remember_answer(item["question"], item["answer"], docs, collection_version, top_k=top_k, model=model,
+                            temperature=temperature)
+    return items
+
+
+def answer_questions(questions: list, chroma_db, top_k: int = 4, model: str = "llama3", temperature: float = 0.0,
+                     collection_version=None, concurrency: int = BATCH_CONCURRENCY) -> list:
+    """
+    Answers many questions: one embedding call and one bulk vector query for all
+    of them, then up to `concurrency` generations at a time. Returns one result
+    per question, in order: {"question", "answer", "sources", "cached", "error", "timings"}.
+    """
+    items = prepare_batch(questions, chroma_db, top_k=top_k, model=model, temperature=temperature,
+                          collection_version=collection_version)
+    pending = [item for item in items if item["docs"] is not None]
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pending)))) as pool:
+            list(pool.map(lambda item: generate_item(item, model=model, temperature=temperature), pending))
+    return finish_batch(items, collection_version, top_k=top_k, model=model, temperature=temperature)
+
+
+def stream_answer(
+    question: str,
+    chroma_db,
+    top_k: int = 4,
+    model: str = "llama3",
+    temperature: float = 0.0,
+    docs: list = None,
+):
+    """
+    Streaming variant of answer_question. Yields (event, data) pairs: one "sources"
+    event with the retrieved chunks, a "token" event per generated chunk, and a
+    final "done" event with timings in milliseconds. Pass `docs` to skip retrieval.
+    """
+    start = time.perf_counter()
+    timings = {}
+    if docs is None:
+        docs = retrieve(question, chroma_db, top_k=top_k)
+        timings["retrieval_ms"] = (time.perf_counter() - start) * 1000
+    yield "sources", sources(docs)
+
+    if not docs:
+        yield "token", "No relevant documents found in the knowledge base."
+        timings["total_ms"] = (time.perf_counter() - start) * 1000
+        yield "done", timings
+        return
+
+    context_stats = {}
+    prompt = build_prompt(question, docs, stats=context_stats)
+    llm = get_llm(model=model, temperature=temperature)
+    tokens = 0
+    generation_start = time.perf_counter()
+    with model_slot(model):
+        for token in llm.stream(prompt):
+            if tokens == 0:
+                timings["first_token_ms"] = (time.perf_counter() - start) * 1000
+                observe_stage("llm_first_token", time.perf_counter() - generation_start)
+            tokens += 1
+            yield "token", token
+
+    end = time.perf_counter()
+    observe_stage("llm_generate", end - generation_start)
+    TOKENS.inc(tokens, kind="generated")
+    timings["generation_ms"] = (end - generation_start) * 1000
+    timings["total_ms"] = (end - start) * 1000
+    timings["tokens"] = tokens
+    timings["context"] = context_stats
+    yield "done", timings
@@ -0,0 +1,121 @@
+# clients.py
+"""
+Shared Ollama clients.
+
+LLM and embedding clients are built once per (model, parameters) and reused,
+so requests talk to Ollama over pooled keep-alive connections instead of
+opening a new HTTP session per question or per manager. langchain_ollama and
+httpx are imported when the first client is built or the models are warmed up.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from langchain_ollama import OllamaEmbeddings, OllamaLLM
+
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL")  # None falls back to OLLAMA_HOST / localhost:11434
+MAX_CONNECTIONS_PER_MODEL = int(os.getenv("BILLYBOT_OLLAMA_MAX_CONNECTIONS", "4"))
+KEEPALIVE_EXPIRY = float(os.getenv("BILLYBOT_OLLAMA_KEEPALIVE_EXPIRY", "60"))
+# How long Ollama keeps warmed-up models loaded, and how long a cold load may take
+MODEL_KEEP_ALIVE = os.getenv("BILLYBOT_OLLAMA_KEEP_ALIVE", "30m")
+WARMUP_TIMEOUT = float(os.getenv("BILLYBOT_OLLAMA_WARMUP_TIMEOUT", "300"))
+
+_clients = {}
+_slots = {}
+_lock = threading.Lock()
+
+
+def _client_kwargs() -> dict:
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=MAX_CONNECTIONS_PER_MODEL,
+            max_keepalive_connections=MAX_CONNECTIONS_PER_MODEL,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        )
+    }
+
+
+def _get_or_create(key, factory):
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = factory()
+        return client
+
+
+def get_llm(model: str = "llama3", temperature: float = 0.0, **params) -> "OllamaLLM":
+    """
+    Returns the shared OllamaLLM for this model and parameter set.
+    """
+    from langchain_ollama import OllamaLLM
+
+    key = ("llm", model, temperature, tuple(sorted(params.items())))
+    return _get_or_create(key, lambda: OllamaLLM(
+        model=model,
+        temperature=temperature,
+        base_url=OLLAMA_BASE_URL,
+        client_kwargs=_client_kwargs(),
+        **params,
+    ))
+
+
+def get_embeddings(model: str = "nomic-embed-text") -> "OllamaEmbeddings":
+    """
+    Returns the shared OllamaEmbeddings client for this model.
+    """
+    from langchain_ollama import OllamaEmbeddings
+
+    return _get_or_create(("embeddings", model), lambda: OllamaEmbeddings(
+        model=model,
+        base_url=OLLAMA_BASE_URL,
+        client_kwargs=_client_kwargs(),
+    ))
+
+
+def ollama_base_url() -> str:
+    url = OLLAMA_BASE_URL or os.getenv("OLLAMA_HOST") or "localhost:11434"
+    return url if "://" in url else f"http://{url}"
+
+
+def warm_up_models(embedding_model: str, llm_model: str, keep_alive: str = MODEL_KEEP_ALIVE):
+    """
+    Loads both models into Ollama's memory and keeps them there for keep_alive.
+    A generate request without a prompt only loads the LLM; one short
+    embedding loads the embedding model. Raises on HTTP or connection errors.
+    """
+    import httpx
+
+    with httpx.Client(base_url=ollama_base_url(), timeout=WARMUP_TIMEOUT) as client:
+        client.post(
+            "/api/generate", json={"model": llm_model, "keep_alive": keep_alive, "stream": False}
+        ).raise_for_status()
+        client.post(
+            "/api/embeddings", json={"model": embedding_model, "prompt": "warm-up", "keep_alive": keep_alive}
+        ).raise_for_status()
+
+
+@contextmanager
+def model_slot(model: str):
+    """
+    Caps concurrent calls per model at MAX_CONNECTIONS_PER_MODEL, across all
+    parameter variants of that model.
+    """
+    with _lock:
+        slot = _slots.get(model)
+        if slot is None:
+            slot = _slots[model] = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_MODEL)
+    with slot:
+        yield
+
+
+def clear_clients():
+    """
+    Drops all cached clients (their connection pools close once unreferenced).
+    """
+    with _lock:
+        _clients.clear()
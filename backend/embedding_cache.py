@@ -0,0 +1,170 @@
+# embedding_cache.py
+"""
+Disk-backed embedding cache.
+
+Vectors are keyed by (embedding model, sha256 of the chunk text) in a small
+SQLite file that lives outside the Chroma directory, so clearing or rebuilding
+the index does not throw away embeddings that were already paid for. The cache
+is capped at a number of entries and evicts the least recently used ones.
+
+The entry count is read once when the file is opened and then kept up to date
+on insert and eviction, so neither writes nor stats() scan the table. Rows
+written by another process sharing the file are picked up on the next open.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+
+EMBEDDING_CACHE_PATH = os.getenv(
+    "BILLYBOT_EMBEDDING_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "billybot", "embeddings.sqlite"),
+)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("BILLYBOT_EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        (self._entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def get_many(self, model: str, hashes: List[str]) -> dict:
+        """
+        Returns {hash: vector} for the hashes that are cached, marking them as used.
+        """
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(part))})",
+                    [model, *part],
+                )
+                for h, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[h] = vector.tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+            self.hits += sum(1 for h in hashes if h in found)
+            self.misses += sum(1 for h in hashes if h not in found)
+        return found
+
+    def put_many(self, model: str, items: dict):
+        """
+        Stores {hash: vector} and evicts least recently used entries over the cap.
+        """
+        now = time.time()
+        rows = [(array("f", v).tobytes(), now, model, h) for h, v in items.items()]
+        with self._lock:
+            self._conn.executemany("UPDATE embeddings SET vector = ?, last_used = ? WHERE model = ? AND hash = ?", rows)
+            added = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (vector, last_used, model, hash) VALUES (?, ?, ?, ?)", rows
+            ).rowcount
+            self._entries += added
+            if self._entries > self.max_entries:
+                evicted = self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN"
+                    " (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (self._entries - self.max_entries,),
+                ).rowcount
+                self._entries -= evicted
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._entries = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        # Plain attribute reads, so a long put_many holding the lock does not stall callers
+        hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "path": self.path,
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Returns the process-wide embedding cache, opening it on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings client so document embeddings are served from the
+    disk cache and only cache misses reach the model.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCache = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache or get_embedding_cache()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(t) for t in texts]
+        found = self.cache.get_many(self.model, hashes)
+        missing = {h: t for h, t in zip(hashes, texts) if h not in found}
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self.cache.put_many(self.model, computed)
+            found.update(computed)
+        return [found[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds several queries in one call, bypassing the cache like embed_query.
+        """
+        return self.embeddings.embed_documents(texts)
@@ -0,0 +1,141 @@
+# executors.py
+"""
+Bounded worker pools for blocking work called from async handlers.
+
+Retrieval, generation and ingestion each get their own pool so a slow
+generation cannot starve uploads (or the event loop). Password hashing gets a
+process pool, so argon2 neither holds the GIL nor ties up request threads. Each pool accepts at most
+max_workers running + max_queue waiting tasks; beyond that submit() raises
+PoolBusy, which the API turns into a 503.
+"""
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class PoolBusy(Exception):
+    """Raised when a pool's queue is full."""
+
+
+class BoundedPool:
+    def __init__(self, name: str, max_workers: int, max_queue: int, processes: bool = False):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.processes = processes
+        if processes:
+            # Workers are started from request threads; forking a threaded process can copy held locks
+            self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"billybot-{name}")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Runs fn on the pool in a copy of the caller's context, so request-scoped
+        state (e.g. stage timings for Server-Timing) follows the work. Process
+        pools run fn as is; it and its arguments must be picklable.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise PoolBusy(f"The {self.name} queue is full, please retry shortly")
+            self._pending += 1
+        try:
+            if self.processes:
+                future = self._executor.submit(fn, *args, **kwargs)
+            else:
+                future = self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Runs fn on the pool and awaits its result without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stream(self, events):
+        """
+        Drains a blocking generator on the pool and returns an async iterator over
+        its items. Raises PoolBusy immediately (before any item is produced) when
+        the pool is full; closing the iterator stops the producer.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        cancelled = threading.Event()
+        finished = object()
+
+        def produce():
+            try:
+                for item in events:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                events.close()
+                loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+        self.submit(produce)
+
+        async def consume():
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is finished:
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                cancelled.set()
+
+        return consume()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending
+            rejected = self._rejected
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": min(pending, self.max_workers),
+            "queued": max(pending - self.max_workers, 0),
+            "rejected": rejected,
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _pool_from_env(name: str, workers: int, queue: int, processes: bool = False) -> BoundedPool:
+    prefix = f"BILLYBOT_{name.upper()}"
+    return BoundedPool(
+        name,
+        max_workers=int(os.getenv(f"{prefix}_WORKERS", str(workers))),
+        max_queue=int(os.getenv(f"{prefix}_QUEUE", str(queue))),
+        processes=processes,
+    )
+
+
+retrieval_pool = _pool_from_env("retrieval", workers=8, queue=64)
+generation_pool = _pool_from_env("generation", workers=4, queue=32)
+ingestion_pool = _pool_from_env("ingestion", workers=2, queue=8)
+# Each argon2 hash takes ~100 MB with passlib defaults, so keep the worker count small
+auth_pool = _pool_from_env("auth", workers=2, queue=32, processes=True)
+
+POOLS = (retrieval_pool, generation_pool, ingestion_pool, auth_pool)
@@ -0,0 +1,633 @@
+# faiss_store.py
+"""
+FAISS-backed alternative to a Chroma collection.
+
+A collection lives in its own directory:
+
+- vectors.<generation>.bin: every stored vector, L2-normalised, as a raw
+  float32 or float16 array (one row per chunk), memory-mapped rather than read
+- index.<generation>.faiss: the Flat, IVF or HNSW index over those rows
+  (inner product, i.e. cosine similarity), read with FAISS's mmap flags where
+  the index type supports them
+- chunks.sqlite: the side table (row -> chunk ID, text, metadata, deleted flag)
+  and the collection settings, including the current generation
+
+Rows are append-only: an upsert appends vectors and marks the rows it replaces
+as deleted, and deleted rows are filtered out of search results. persist()
+compacts them away once they make up COMPACT_RATIO of the collection, writing
+the next generation's files and switching to it in one SQLite transaction, so
+an interrupted compaction leaves the previous generation intact. Rows written
+after the index was last saved are added back from the vector file on open.
+
+With quantization ("sq8": 8-bit scalar quantization, "pq": product
+quantization) the index holds compact codes instead of the vectors, and each
+query rescores its top candidates against the full-precision vector file, so
+memory holds the codes while accuracy stays close to the unquantized index.
+
+FaissStore offers the part of the langchain Chroma API that VectorStoreManager
+and chatbot use: similarity_search, similarity_search_by_vector, persist,
+delete_collection, embeddings and _collection.get/upsert/delete/query/count.
+"""
+import glob
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, List
+
+import faiss
+import numpy as np
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+VECTOR_DTYPES = ("float32", "float16")
+QUANTIZATIONS = ("none", "sq8", "pq")
+
+# HNSW graph degree and the candidate list sizes used while building and searching
+HNSW_M = int(os.getenv("BILLYBOT_FAISS_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("BILLYBOT_FAISS_HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("BILLYBOT_FAISS_HNSW_EF_SEARCH", "64"))
+
+# IVF needs training data: collections smaller than IVF_MIN_TRAIN use a flat index,
+# and the IVF index is retrained on persist() once the collection has grown 4x.
+# nlist defaults to 4 * sqrt(vectors); nprobe lists are scanned per query.
+IVF_MIN_TRAIN = int(os.getenv("BILLYBOT_FAISS_IVF_MIN_TRAIN", "10000"))
+IVF_NLIST = int(os.getenv("BILLYBOT_FAISS_IVF_NLIST", "0"))
+IVF_NPROBE = int(os.getenv("BILLYBOT_FAISS_IVF_NPROBE", "16"))
+
+# Quantized indexes rescore RESCORE_FACTOR * k candidates with the full-precision vectors.
+# PQ splits each vector into PQ_SUBVECTORS 8-bit codes (default: one per 8 dimensions) and
+# needs PQ_MIN_TRAIN vectors to train its codebooks; smaller collections stay unquantized.
+RESCORE_FACTOR = int(os.getenv("BILLYBOT_FAISS_RESCORE_FACTOR", "8"))
+PQ_SUBVECTORS = int(os.getenv("BILLYBOT_FAISS_PQ_SUBVECTORS", "0"))
+PQ_MIN_TRAIN = int(os.getenv("BILLYBOT_FAISS_PQ_MIN_TRAIN", "10000"))
+
+# Share of deleted rows at which persist() rewrites the collection without them
+COMPACT_RATIO = float(os.getenv("BILLYBOT_FAISS_COMPACT_RATIO", "0.2"))
+
+# Read persisted indexes through mmap instead of into memory: IVF inverted lists
+# with IO_FLAG_MMAP, flat and HNSW vector codes with IO_FLAG_MMAP_IFC (newer FAISS)
+_MMAP_FLAGS = {
+    "ivf": faiss.IO_FLAG_MMAP,
+    "flat": getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP),
+    "hnsw": getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP),
+}
+
+_ADD_BATCH = 65536
+# Training samples: 256 points per IVF list (the k-means cap FAISS applies anyway) and
+# at least 39 per PQ centroid (FAISS's minimum); codebook training time grows with the sample
+_TRAIN_POINTS_PER_LIST = 256
+_CODEC_TRAIN_POINTS = 39 * 256
+_SQL_BATCH = 500
+
+# One FaissCollection per directory in this process, so every handle sees the same rows
+_open_collections = weakref.WeakValueDictionary()
+_open_lock = threading.Lock()
+# Per-directory locks, so a slow open (index rebuild) only blocks opens of that directory
+_directory_locks = {}
+
+
+def _normalized(vectors) -> np.ndarray:
+    array = np.array(vectors, dtype=np.float32, ndmin=2)
+    faiss.normalize_L2(array)
+    return array
+
+
+def _pq_subvectors(dimensions: int) -> int:
+    # PQ needs a sub-vector count that divides the dimensions
+    target = min(PQ_SUBVECTORS or max(1, dimensions // 8), dimensions)
+    return max(m for m in range(1, target + 1) if dimensions % m == 0)
+
+
+def _validate(index_type: str, quantization: str):
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type: {index_type} (expected one of {', '.join(INDEX_TYPES)})")
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization} (expected one of {', '.join(QUANTIZATIONS)})")
+
+
+def _chunks(items: list, size: int = _SQL_BATCH):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class _ReadWriteLock:
+    """
+    Any number of readers or one writer. Waiting writers hold back new readers,
+    so a steady stream of searches cannot starve ingestion.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class FaissCollection:
+    """
+    One FAISS collection on disk, with the Chroma collection methods that
+    ingestion and retrieval call. Searches and reads run concurrently (FAISS
+    search releases the GIL); writes, compaction and rebuilds are exclusive.
+    """
+
+    def __init__(self, directory: str, index_type: str = "hnsw", dtype: str = "float32", quantization: str = "none"):
+        _validate(index_type, quantization)
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype} (expected one of {', '.join(VECTOR_DTYPES)})")
+        self.directory = directory
+        self.index_type = index_type
+        self.quantization = quantization
+        self.closed = False
+        self._lock = _ReadWriteLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, "chunks.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " row INTEGER PRIMARY KEY, id TEXT NOT NULL, document TEXT, metadata TEXT,"
+            " deleted INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS chunks_live_id ON chunks (id) WHERE deleted = 0")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._settings = dict(self._conn.execute("SELECT key, value FROM settings"))
+
+        # Vectors keep the dtype the collection was created with
+        self.dtype = self._settings.get("dtype", dtype)
+        self.dimensions = int(self._settings["dimensions"]) if "dimensions" in self._settings else None
+        self._generation = int(self._settings.get("generation", 0))
+        self._rows = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM chunks").fetchone()[0]
+        self._deleted = np.zeros(self._rows, dtype=bool)
+        self._deleted[[row for (row,) in self._conn.execute("SELECT row FROM chunks WHERE deleted = 1")]] = True
+
+        self._vectors = None
+        self._index = None
+        self._index_kind = None
+        self._index_codec = None
+        self._index_mapped = False
+        self._index_dirty = False
+        self._trained_rows = int(self._settings.get("trained_rows", 0))
+        self._remove_stale_files()
+        if self.dimensions is not None:
+            self._open_index()
+
+    # ----------------------------
+    # Files and settings
+    # ----------------------------
+    def _vectors_path(self, generation: int = None) -> str:
+        return os.path.join(self.directory, f"vectors.{self._generation if generation is None else generation}.bin")
+
+    def _index_path(self, generation: int = None) -> str:
+        return os.path.join(self.directory, f"index.{self._generation if generation is None else generation}.faiss")
+
+    def _remove_stale_files(self):
+        # Leftovers of an earlier generation or of an interrupted compaction
+        current = {self._vectors_path(), self._index_path()}
+        for path in glob.glob(os.path.join(self.directory, "*.faiss*")) + glob.glob(os.path.join(self.directory, "*.bin")):
+            if path not in current and re.fullmatch(r"(vectors|index)\.\d+\.(bin|faiss)(\.tmp)?", os.path.basename(path)):
+                os.remove(path)
+
+    def _save_settings(self, **values):
+        # Caller commits
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", [(k, str(v)) for k, v in values.items()]
+        )
+        self._settings.update({k: str(v) for k, v in values.items()})
+
+    def _row_bytes(self) -> int:
+        return self.dimensions * np.dtype(self.dtype).itemsize
+
+    def _vector_rows(self, generation: int = None, rows: int = None) -> np.ndarray:
+        """
+        Memory-mapped (rows x dimensions) view of a generation's vector file.
+        """
+        rows = self._rows if rows is None else rows
+        if generation is not None:
+            return np.memmap(self._vectors_path(generation), dtype=self.dtype, mode="r", shape=(rows, self.dimensions))
+        # Read into a local: concurrent searches may remap at the same time
+        vectors = self._vectors
+        if vectors is None or len(vectors) != rows:
+            if rows == 0:
+                self._vectors = None
+                return np.empty((0, self.dimensions), dtype=self.dtype)
+            vectors = self._vectors = np.memmap(
+                self._vectors_path(), dtype=self.dtype, mode="r", shape=(rows, self.dimensions)
+            )
+        return vectors
+
+    def count(self) -> int:
+        return int(self._rows - np.count_nonzero(self._deleted))
+
+    # ----------------------------
+    # Index
+    # ----------------------------
+    def _target_kind(self, live: int) -> str:
+        if self.index_type == "ivf" and live < max(IVF_MIN_TRAIN, 1):
+            return "flat"
+        return self.index_type
+
+    def _target_codec(self, live: int) -> str:
+        # Quantizers are trained on live rows: without any, store plain vectors until persist() retrains.
+        # PQ also needs a training point per centroid of its 8-bit codebooks.
+        if (self.quantization == "pq" and live < max(PQ_MIN_TRAIN, 256)) or live == 0:
+            return "none"
+        return self.quantization
+
+    def _new_index(self, kind: str, codec: str, live: int):
+        metric = faiss.METRIC_INNER_PRODUCT
+        if codec == "sq8":
+            codes = "SQ8"
+        elif codec == "pq":
+            # "np": no polysemous training, which only serves Hamming filtering and is slow
+            codes = f"PQ{_pq_subvectors(self.dimensions)}np"
+        else:
+            codes = "SQfp16" if self.dtype == "float16" else "Flat"
+        if kind == "hnsw":
+            if codes == "Flat":
+                index = faiss.IndexHNSWFlat(self.dimensions, HNSW_M, metric)
+            elif codes.startswith("SQ"):
+                qtype = faiss.ScalarQuantizer.QT_8bit if codes == "SQ8" else faiss.ScalarQuantizer.QT_fp16
+                index = faiss.IndexHNSWSQ(self.dimensions, qtype, HNSW_M, metric)
+            else:
+                index = faiss.index_factory(self.dimensions, f"HNSW{HNSW_M}_{codes[:-2]}", metric)
+                faiss.downcast_index(index.storage).do_polysemous_training = False
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            return index
+        if kind == "ivf":
+            # About 39+ training points per list keeps k-means from warning about empty lists
+            nlist = max(1, min(IVF_NLIST or int(4 * math.sqrt(live)), live // 39))
+            return faiss.index_factory(self.dimensions, f"IVF{nlist},{codes}", metric)
+        return faiss.index_factory(self.dimensions, codes, metric)
+
+    def _build_index(self, kind: str, codec: str, vectors: np.ndarray, live_rows: np.ndarray):
+        """
+        Builds a `kind` index with `codec` codes over every row of `vectors` (row i
+        gets ID i), training it on live rows first when it needs training.
+        """
+        index = self._new_index(kind, codec, len(live_rows))
+        if not index.is_trained:
+            points = min(len(live_rows), max(getattr(index, "nlist", 0) * _TRAIN_POINTS_PER_LIST, _CODEC_TRAIN_POINTS))
+            sample = np.sort(np.random.default_rng(0).choice(live_rows, points, replace=False))
+            index.train(np.ascontiguousarray(vectors[sample], dtype=np.float32))
+        for i in range(0, len(vectors), _ADD_BATCH):
+            index.add(np.ascontiguousarray(vectors[i:i + _ADD_BATCH], dtype=np.float32))
+        return index
+
+    def _rebuild_index(self, kind: str, codec: str):
+        live_rows = np.flatnonzero(~self._deleted)
+        self._index = self._build_index(kind, codec, self._vector_rows(), live_rows)
+        self._index_kind, self._index_codec = kind, codec
+        self._trained_rows = len(live_rows)
+        self._index_mapped = False
+        self._index_dirty = True
+
+    def _open_index(self):
+        kind = self._settings.get("index")
+        codec = self._settings.get("codec", "none")
+        path = self._index_path()
+        index = None
+        kind_matches = kind == self.index_type or (self.index_type == "ivf" and kind == "flat")
+        codec_matches = codec in (self.quantization, "none")
+        if os.path.exists(path) and kind_matches and codec_matches:
+            try:
+                index, self._index_mapped = faiss.read_index(path, _MMAP_FLAGS[kind]), True
+            except RuntimeError:
+                index, self._index_mapped = faiss.read_index(path), False
+            if index.d != self.dimensions or index.ntotal > self._rows:
+                index = None
+        if index is None:
+            self._rebuild_index(self._target_kind(self.count()), self._target_codec(self.count()))
+            return
+        self._index, self._index_kind, self._index_codec = index, kind, codec
+        if index.ntotal < self._rows:
+            # Rows written after the index was last saved
+            self._add_rows(index.ntotal)
+
+    def _writable_index(self):
+        if self._index_mapped:
+            # A memory-mapped index is read-only; load it into memory before adding to it
+            self._index = faiss.read_index(self._index_path())
+            self._index_mapped = False
+        return self._index
+
+    def _add_rows(self, start: int):
+        index = self._writable_index()
+        vectors = self._vector_rows()
+        for i in range(start, self._rows, _ADD_BATCH):
+            index.add(np.ascontiguousarray(vectors[i:i + _ADD_BATCH], dtype=np.float32))
+        self._index_dirty = True
+
+    def configure(self, index_type: str, quantization: str):
+        """
+        Switches the index type or quantization, rebuilding the index from the stored vectors.
+        """
+        _validate(index_type, quantization)
+        with self._lock.write():
+            if (index_type, quantization) == (self.index_type, self.quantization):
+                return
+            self.index_type, self.quantization = index_type, quantization
+            if self.dimensions is not None:
+                self._rebuild_index(self._target_kind(self.count()), self._target_codec(self.count()))
+
+    # ----------------------------
+    # Chroma collection methods
+    # ----------------------------
+    def _live_rows(self, ids: List[str]) -> dict:
+        found = {}
+        for part in _chunks(list(dict.fromkeys(ids))):
+            rows = self._conn.execute(
+                f"SELECT id, row FROM chunks WHERE deleted = 0 AND id IN ({','.join('?' * len(part))})", part
+            )
+            found.update(rows)
+        return found
+
+    def _records(self, rows) -> dict:
+        found = {}
+        for part in _chunks([int(row) for row in rows]):
+            records = self._conn.execute(
+                f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({','.join('?' * len(part))})", part
+            )
+            for row, chunk_id, document, metadata in records:
+                found[row] = (chunk_id, document, json.loads(metadata) if metadata else None)
+        return found
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str] = None, metadatas: List[dict] = None):
+        if not ids:
+            return
+        vectors = _normalized(embeddings)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+        # The last occurrence wins for IDs repeated within the batch
+        keep = sorted({chunk_id: i for i, chunk_id in enumerate(ids)}.values())
+        with self._lock.write():
+            if self.dimensions is None:
+                self.dimensions = vectors.shape[1]
+                with self._conn:
+                    self._save_settings(dimensions=self.dimensions, dtype=self.dtype, generation=self._generation)
+            elif vectors.shape[1] != self.dimensions:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match collection dimensionality {self.dimensions}"
+                )
+            start = self._rows
+            # Vectors first: rows only exist once the side table commits them
+            with open(self._vectors_path(), "a+b") as f:
+                f.truncate(start * self._row_bytes())
+                f.write(vectors[keep].astype(self.dtype).tobytes())
+            replaced = list(self._live_rows([ids[i] for i in keep]).values())
+            with self._conn:
+                self._conn.executemany("UPDATE chunks SET deleted = 1 WHERE row = ?", [(row,) for row in replaced])
+                self._conn.executemany(
+                    "INSERT INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [(start + n, ids[i], documents[i], json.dumps(metadatas[i] or {})) for n, i in enumerate(keep)],
+                )
+            self._rows += len(keep)
+            self._deleted = np.concatenate([self._deleted, np.zeros(len(keep), dtype=bool)])
+            self._deleted[replaced] = True
+            if self._index is None:
+                self._rebuild_index(self._target_kind(self.count()), self._target_codec(self.count()))
+            else:
+                self._add_rows(start)
+
+    def delete(self, ids: List[str] = None):
+        with self._lock.write():
+            rows = list(self._live_rows(ids or []).values())
+            if not rows:
+                return
+            with self._conn:
+                self._conn.executemany("UPDATE chunks SET deleted = 1 WHERE row = ?", [(row,) for row in rows])
+            self._deleted[rows] = True
+
+    def get(self, ids: List[str] = None, include: List[str] = ("metadatas", "documents")) -> dict:
+        with self._lock.read():
+            if ids is None:
+                rows = np.flatnonzero(~self._deleted).tolist()
+            else:
+                rows = list(self._live_rows(ids).values())
+            records = self._records(rows) if rows else {}
+        rows = sorted(records)
+        result = {"ids": [records[row][0] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [records[row][1] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [records[row][2] for row in rows]
+        return result
+
+    def _search(self, queries: np.ndarray, k: int):
+        # Per-call parameters: concurrent searches never write to the shared index
+        params = None
+        if self._index_kind == "hnsw":
+            params = faiss.SearchParametersHNSW(efSearch=max(HNSW_EF_SEARCH, k))
+        elif self._index_kind == "ivf":
+            params = faiss.SearchParametersIVF(nprobe=IVF_NPROBE)
+        return self._index.search(queries, k, params=params)
+
+    def _rescore(self, query: np.ndarray, hits: list, n: int) -> list:
+        # Exact inner products from the vector file, read in row order
+        if not hits:
+            return hits
+        rows = np.array(sorted(row for row, _ in hits))
+        scores = np.asarray(self._vector_rows()[rows], dtype=np.float32) @ query
+        return [(int(rows[i]), float(scores[i])) for i in np.argsort(-scores, kind="stable")[:n]]
+
+    def query(self, query_embeddings, n_results: int = 10, include: List[str] = ("metadatas", "documents", "distances")) -> dict:
+        """
+        Nearest live rows per query embedding, in Chroma's result layout
+        (distances are cosine distances).
+        """
+        queries = _normalized(query_embeddings)
+        with self._lock.read():
+            live = self.count()
+            n = min(n_results, live)
+            rescore = self._index_codec not in (None, "none")
+            wanted = min(n * RESCORE_FACTOR, live) if rescore else n
+            hits = [[] for _ in queries]
+            if self._index is not None and n > 0:
+                # Deleted rows still sit in the index: widen the search until enough live rows are found
+                fetch = wanted if live == self._rows else 2 * wanted
+                while True:
+                    fetch = min(fetch, self._rows)
+                    scores, rows = self._search(queries, fetch)
+                    hits = [
+                        [(int(row), float(score)) for row, score in zip(found, found_scores)
+                         if row >= 0 and not self._deleted[row]][:wanted]
+                        for found, found_scores in zip(rows, scores)
+                    ]
+                    if fetch >= self._rows or all(len(h) == wanted for h in hits):
+                        break
+                    fetch *= 4
+                if rescore:
+                    hits = [self._rescore(query, h, n) for query, h in zip(queries, hits)]
+            records = self._records({row for h in hits for row, _ in h})
+
+        result = {"ids": [[records[row][0] for row, _ in h] for h in hits]}
+        if "documents" in include:
+            result["documents"] = [[records[row][1] for row, _ in h] for h in hits]
+        if "metadatas" in include:
+            result["metadatas"] = [[records[row][2] for row, _ in h] for h in hits]
+        if "distances" in include:
+            result["distances"] = [[1.0 - score for _, score in h] for h in hits]
+        return result
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+    def persist(self):
+        """
+        Compacts deleted rows or retrains IVF when due, and saves the index.
+        """
+        with self._lock.write():
+            if self._index is None:
+                return
+            live = self.count()
+            if np.count_nonzero(self._deleted) > COMPACT_RATIO * self._rows:
+                self._compact()
+                return
+            kind, codec = self._target_kind(live), self._target_codec(live)
+            trained = kind == "ivf" or codec != "none"
+            if (kind, codec) != (self._index_kind, self._index_codec) or (trained and live >= 4 * max(self._trained_rows, 1)):
+                self._rebuild_index(kind, codec)
+            if self._index_dirty:
+                tmp_path = f"{self._index_path()}.tmp"
+                faiss.write_index(self._index, tmp_path)
+                os.replace(tmp_path, self._index_path())
+                with self._conn:
+                    self._save_settings(index=self._index_kind, codec=self._index_codec, trained_rows=self._trained_rows)
+                self._index_dirty = False
+
+    def _compact(self):
+        # Caller holds the lock
+        generation = self._generation + 1
+        live_rows = np.flatnonzero(~self._deleted)
+        vectors = self._vector_rows()
+        with open(self._vectors_path(generation), "wb") as f:
+            for part in _chunks(live_rows, _ADD_BATCH):
+                f.write(np.ascontiguousarray(vectors[part]).tobytes())
+        kind, codec = self._target_kind(len(live_rows)), self._target_codec(len(live_rows))
+        if len(live_rows):
+            compacted = self._vector_rows(generation, len(live_rows))
+        else:
+            compacted = np.empty((0, self.dimensions), dtype=self.dtype)
+        index = self._build_index(kind, codec, compacted, np.arange(len(live_rows)))
+        faiss.write_index(index, self._index_path(generation))
+
+        # Renumber the live rows 0..n-1, moving them out of the way first to keep row unique
+        with self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE deleted = 1")
+            self._conn.executemany("UPDATE chunks SET row = ? WHERE row = ?", [(-1 - int(r), int(r)) for r in live_rows])
+            self._conn.executemany(
+                "UPDATE chunks SET row = ? WHERE row = ?", [(n, -1 - int(r)) for n, r in enumerate(live_rows)]
+            )
+            self._save_settings(generation=generation, index=kind, codec=codec, trained_rows=len(live_rows))
+
+        self._generation = generation
+        self._rows = len(live_rows)
+        self._deleted = np.zeros(self._rows, dtype=bool)
+        self._vectors = compacted
+        self._index, self._index_kind, self._index_codec = index, kind, codec
+        self._trained_rows = len(live_rows)
+        self._index_mapped = self._index_dirty = False
+        self._remove_stale_files()
+
+    def drop(self):
+        """
+        Deletes the collection's files. The collection cannot be used afterwards.
+        """
+        with self._lock.write():
+            self.closed = True
+            self._index = self._vectors = None
+            self._conn.close()
+            shutil.rmtree(self.directory, ignore_errors=True)
+        with _open_lock:
+            if _open_collections.get(os.path.abspath(self.directory)) is self:
+                del _open_collections[os.path.abspath(self.directory)]
+
+
+def open_collection(
+    directory: str, index_type: str = "hnsw", dtype: str = "float32", quantization: str = "none"
+) -> FaissCollection:
+    """
+    Returns this process's FaissCollection for a directory, opening it if needed.
+    """
+    root = os.path.abspath(directory)
+    with _open_lock:
+        directory_lock = _directory_locks.setdefault(root, threading.Lock())
+    with directory_lock:
+        with _open_lock:
+            collection = _open_collections.get(root)
+        if collection is None or collection.closed or not os.path.isdir(root):
+            collection = FaissCollection(root, index_type, dtype, quantization)
+            with _open_lock:
+                _open_collections[root] = collection
+    collection.configure(index_type, quantization)
+    return collection
+
+
+class FaissStore:
+    """
+    Vector store over a FaissCollection with the Chroma methods BillyBot uses.
+    """
+
+    def __init__(
+        self, directory: str, embedding_function, index_type: str = "hnsw", dtype: str = "float32",
+        quantization: str = "none",
+    ):
+        self.embeddings = embedding_function
+        self._collection = open_collection(directory, index_type, dtype, quantization)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List["Document"]:
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k=k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List["Document"]:
+        # Imported here so the collection itself only needs faiss and numpy
+        from langchain_core.documents import Document
+
+        result = self._collection.query([embedding], n_results=k, include=["documents", "metadatas"])
+        return [
+            Document(page_content=text or "", metadata=metadata or {})
+            for text, metadata in zip(result["documents"][0], result["metadatas"][0])
+        ]
+
+    def persist(self):
+        self._collection.persist()
+
+    def delete_collection(self):
+        self._collection.drop()
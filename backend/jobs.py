@@ -0,0 +1,168 @@
+# jobs.py
+"""
+Background ingestion jobs.
+
+/upload stores the files under the job's directory and returns a job ID right
+away; the ingestion pool drains the queued jobs. Each job's state is kept in
+`<jobs_dir>/<job_id>/job.json`, so jobs that were queued or running when the
+process stopped are picked up again on startup. A resumed job re-runs
+ingestion, and because chunks are content-addressed, every batch that was
+already committed to the collection is reused rather than embedded again.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from executors import PoolBusy
+from metrics import ERRORS
+from vector_store import VectorStoreManager
+
+
+JOBS_DIR = os.getenv("BILLYBOT_JOBS_DIR", "billybot_jobs")
+JOB_RETENTION_SECONDS = float(os.getenv("BILLYBOT_JOB_RETENTION", str(7 * 24 * 3600)))
+
+
+class JobManager:
+    def __init__(self, pool, jobs_dir: str = JOBS_DIR):
+        self.pool = pool
+        self.jobs_dir = jobs_dir
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _save(self, job: dict):
+        path = os.path.join(self._job_dir(job["id"]), "job.json")
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            data = json.dumps(job)
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def new_job(self) -> tuple:
+        """
+        Reserves a job ID and returns (job_id, files_dir) to store its uploads in.
+        """
+        job_id = uuid.uuid4().hex
+        files_dir = os.path.join(self._job_dir(job_id), "files")
+        os.makedirs(files_dir)
+        return job_id, files_dir
+
+    def discard(self, job_id: str):
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    def submit(self, job_id: str, config: dict, overwrite: bool = False, tenant: str = None) -> dict:
+        """
+        Queues ingestion of every file in the job's files directory with the given
+        VectorStoreManager settings. The job is only visible to `tenant` (None for
+        the shared collection). Raises PoolBusy when the ingestion queue is full.
+        """
+        files_dir = os.path.join(self._job_dir(job_id), "files")
+        job = {
+            "id": job_id,
+            "tenant": tenant,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "config": config,
+            "overwrite": overwrite,
+            "files": sorted(os.listdir(files_dir)),
+            "attempts": 0,
+            "progress": {},
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        self._save(job)
+        try:
+            self.pool.submit(self._run, job_id)
+        except PoolBusy:
+            with self._lock:
+                del self._jobs[job_id]
+            self.discard(job_id)
+            raise
+        return job
+
+    def _run(self, job_id: str):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            job["attempts"] += 1
+            overwrite = job["overwrite"] and job["attempts"] == 1
+        self._save(job)
+
+        files_dir = os.path.join(self._job_dir(job_id), "files")
+        paths = [os.path.join(files_dir, name) for name in job["files"]]
+        try:
+            manager = VectorStoreManager(**job["config"])
+            # ingest_pdfs updates the report dict in place under our lock, so /jobs/{id}
+            # sees live progress and never serializes it mid-update
+            manager.ingest_pdfs(paths, overwrite=overwrite, report=job["progress"], report_lock=self._lock)
+            status, error = "completed", None
+        except Exception as e:
+            ERRORS.inc(where="ingest_job")
+            status, error = "failed", str(e)
+
+        with self._lock:
+            job["status"] = status
+            job["error"] = error
+            job["finished_at"] = time.time()
+        self._save(job)
+        shutil.rmtree(files_dir, ignore_errors=True)
+
+    def get(self, job_id: str, tenant: str = None):
+        """Returns a copy of the job if it belongs to `tenant`, else None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job and job.get("tenant") == tenant else None
+
+    def list(self, tenant: str = None) -> list:
+        """Copies of `tenant`'s jobs, newest first."""
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if j.get("tenant") == tenant]
+            jobs.sort(key=lambda j: j["created_at"], reverse=True)
+            return json.loads(json.dumps(jobs))
+
+    def resume(self):
+        """
+        Loads saved jobs, drops finished ones past retention and re-queues jobs
+        that were queued or running when the process stopped.
+        """
+        if not os.path.isdir(self.jobs_dir):
+            return
+        now = time.time()
+        for job_id in os.listdir(self.jobs_dir):
+            path = os.path.join(self._job_dir(job_id), "job.json")
+            try:
+                with open(path) as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                # Reserved but never submitted (or unreadable): nothing to resume
+                self.discard(job_id)
+                continue
+
+            if job["status"] in ("completed", "failed"):
+                if now - (job["finished_at"] or now) > JOB_RETENTION_SECONDS:
+                    self.discard(job_id)
+                else:
+                    with self._lock:
+                        self._jobs[job_id] = job
+                continue
+
+            job["status"] = "queued"
+            job["resumed"] = True
+            with self._lock:
+                self._jobs[job_id] = job
+            self._save(job)
+            try:
+                self.pool.submit(self._run, job_id)
+                print(f"Resumed ingestion job {job_id}")
+            except PoolBusy:
+                print(f"Warning: ingestion queue full, job {job_id} stays queued until next restart")
@@ -1,21 +1,120 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-import tempfile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import os
 import json
+import time
+import hashlib
+import asyncio
 from typing import List
-import uvicorn
 import shutil
-from vector_store import VectorStoreManager
-from chatbot import answer_question
-from pymongo import MongoClient
-from bson import ObjectId
-from auth import hash_password, verify_password, create_access_token, decode_access_token
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from vector_store import (
+    VectorStoreManager, invalidate_collections, remove_manifests, INDEX_BACKEND, FAISS_INDEX, FAISS_DTYPE,
+    FAISS_QUANTIZATION,
+)
+from chatbot import (
+    retrieve, generate_answer, stream_answer, cached_answer, remember_answer,
+    prepare_batch, generate_item, finish_batch, BATCH_CONCURRENCY,
+    query_embedding_cache, answer_cache,
+)
+from executors import PoolBusy, POOLS, auth_pool, retrieval_pool, generation_pool, ingestion_pool
+from jobs import JobManager
+from clients import warm_up_models
+import metrics
+from uploads import (
+    MAX_UPLOAD_REQUEST_BYTES, UploadBudget, UploadTooLarge, save_upload,
+)
+from auth import (
+    hash_password, verify_password, create_access_token, decode_access_token, tenant_id, token_cache,
+)
 
 # authentication for all apis pending
 
 
-app = FastAPI(title="BillyBot API", version="1.0.0")
+# Background ingestion jobs, drained by the ingestion pool
+jobs = JobManager(ingestion_pool)
+
+MAX_BATCH_QUESTIONS = int(os.getenv("BILLYBOT_MAX_BATCH_QUESTIONS", "500"))
+
+
+# MongoDB settings; motor and pymongo are imported and the async client created at startup
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+MONGO_MAX_POOL_SIZE = int(os.getenv("BILLYBOT_MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("BILLYBOT_MONGO_MIN_POOL_SIZE", "0"))
+MONGO_TIMEOUT_MS = int(os.getenv("BILLYBOT_MONGO_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("BILLYBOT_MONGO_SOCKET_TIMEOUT_MS", "10000"))
+
+client = None
+db = None
+users = None
+uploads = None
+
+# The last active manager configuration, restored and warmed up at startup
+MANAGER_STATE_PATH = os.getenv("BILLYBOT_MANAGER_STATE", "billybot_manager.json")
+WARMUP_ENABLED = os.getenv("BILLYBOT_WARMUP", "1") != "0"
+WARMUP_RETRY_SECONDS = float(os.getenv("BILLYBOT_WARMUP_RETRY_SECONDS", "10"))
+WARMUP_MAX_ATTEMPTS = int(os.getenv("BILLYBOT_WARMUP_MAX_ATTEMPTS", "12"))
+# Opt-in: report ready even when the models never loaded (they then load on first use)
+READY_WITHOUT_MODELS = os.getenv("BILLYBOT_READY_WITHOUT_MODELS", "0") == "1"
+# Each tenant's collection settings, fixed by its first upload (see tenant_manager)
+TENANT_STATE_DIR = os.getenv("BILLYBOT_TENANT_STATE_DIR", "billybot_tenants")
+DEFAULT_LLM_MODEL = "llama3"
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+
+# Reported by /ready; "status" becomes "ready" once warm-up has finished, or
+# "unavailable" when the models could not be loaded
+readiness = {"status": "starting", "collection": None, "models": None, "error": None}
+
+
+async def ensure_indexes():
+    """
+    Unique emails for register/login lookups; per-user upload history by time;
+    per-collection uploads for tenant data removal.
+    """
+    from pymongo import ASCENDING, DESCENDING
+    from pymongo.errors import PyMongoError
+
+    try:
+        await users.create_index([("email", ASCENDING)], unique=True)
+        await uploads.create_index([("user_id", ASCENDING), ("uploaded_at", DESCENDING)])
+        await uploads.create_index([("collection", ASCENDING)])
+    except PyMongoError as e:
+        # The API still serves documents and questions without MongoDB
+        print(f"Warning: could not create MongoDB indexes: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db, users, uploads
+    # Imported here so importing main (and every worker start) skips motor and pymongo
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(
+        MONGODB_URI,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+    )
+    db = client["billybot"]
+    users = db["users"]
+    uploads = db["uploads"]
+    jobs.resume()
+    # Index creation and warm-up wait on MongoDB and Ollama, so they run after
+    # startup and /health answers as soon as the server is listening
+    background = [asyncio.create_task(ensure_indexes()), asyncio.create_task(warm_up())]
+    yield
+    for task in background:
+        task.cancel()
+    client.close()
+    for pool in POOLS:
+        pool.shutdown(wait=False)
+
+
+app = FastAPI(title="BillyBot API", version="1.0.0", lifespan=lifespan)
 
 # Global manager instance
 manager = None
@@ -31,11 +130,284 @@ app.add_middleware(
 # Global manager instance
 manager = None
 
-# MongoDB setup
-client = MongoClient("mongodb://localhost:27017/")
-db = client["billybot"]
-users = db["users"]
-uploads = db["uploads"]
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads from Content-Length before the body is parsed."""
+    if request.url.path == "/upload":
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > MAX_UPLOAD_REQUEST_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Upload exceeds the {MAX_UPLOAD_REQUEST_BYTES // (1024 * 1024)} MB per-request limit"},
+            )
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Time each request and report its stage timings in a Server-Timing header."""
+    timings = metrics.start_request_timings()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.HTTP_REQUEST_SECONDS.observe(elapsed, method=request.method, path=path, status=response.status_code)
+    if response.status_code >= 500:
+        metrics.ERRORS.inc(where="http")
+    # Streaming responses only include stages finished before the first byte
+    response.headers["Server-Timing"] = ", ".join(
+        filter(None, [metrics.server_timing_header(timings), f"total;dur={elapsed * 1000:.1f}"])
+    )
+    return response
+
+
+def embedding_cache_stats() -> dict:
+    # embedding_cache subclasses a LangChain base class, so it is imported on first use;
+    # callers on the event loop run this in a thread since the first call also opens the cache
+    from embedding_cache import get_embedding_cache
+
+    return get_embedding_cache().stats()
+
+
+def collect_component_metrics():
+    caches = {
+        "embedding": embedding_cache_stats(),
+        "query_embedding": query_embedding_cache.stats(),
+        "answer": answer_cache.stats(),
+        "token": token_cache.stats(),
+    }
+    pools = {pool.name: pool.stats() for pool in POOLS}
+    return [
+        ("billybot_cache_hits_total", "counter", "Cache hits",
+         [({"cache": name}, stats["hits"]) for name, stats in caches.items()]),
+        ("billybot_cache_misses_total", "counter", "Cache misses",
+         [({"cache": name}, stats["misses"]) for name, stats in caches.items()]),
+        ("billybot_pool_running", "gauge", "Tasks running on each worker pool",
+         [({"pool": name}, stats["running"]) for name, stats in pools.items()]),
+        ("billybot_pool_queued", "gauge", "Tasks waiting on each worker pool",
+         [({"pool": name}, stats["queued"]) for name, stats in pools.items()]),
+        ("billybot_pool_rejected_total", "counter", "Tasks rejected because a pool queue was full",
+         [({"pool": name}, stats["rejected"]) for name, stats in pools.items()]),
+    ]
+
+
+metrics.register_collector(collect_component_metrics)
+
+
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large_handler(request, exc: UploadTooLarge):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
+@app.exception_handler(PoolBusy)
+async def pool_busy_handler(request, exc: PoolBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+def get_manager(settings_dict: dict) -> VectorStoreManager:
+    """
+    Returns the current manager if it matches the requested settings, else builds a new one.
+    Embedding clients are shared, so rebuilding only costs a new splitter.
+    """
+    config = dict(
+        persist_directory=settings_dict.get("persistDir", "chroma_kb_db"),
+        embedding_model=settings_dict.get("embeddingModel", DEFAULT_EMBEDDING_MODEL),
+        chunk_size=settings_dict.get("chunkSize", 1000),
+        chunk_overlap=settings_dict.get("chunkOverlap", 150),
+        index_backend=settings_dict.get("indexBackend", INDEX_BACKEND),
+        faiss_index=settings_dict.get("faissIndex", FAISS_INDEX),
+        vector_dtype=settings_dict.get("vectorDtype", FAISS_DTYPE),
+        quantization=settings_dict.get("quantization", FAISS_QUANTIZATION),
+    )
+    if manager is not None and all(getattr(manager, k) == v for k, v in config.items()):
+        return manager
+    return VectorStoreManager(**config)
+
+
+# tenant -> (state file mtime, manager), so requests only stat the state file
+_tenant_managers = {}
+
+
+def _tenant_state_path(tenant: str) -> str:
+    return os.path.join(TENANT_STATE_DIR, f"{hashlib.sha256(tenant.encode()).hexdigest()[:32]}.json")
+
+
+def save_tenant_config(tenant: str, target: VectorStoreManager):
+    """Records the settings of a tenant's collection; later requests resolve the tenant with them."""
+    os.makedirs(TENANT_STATE_DIR, exist_ok=True)
+    path = _tenant_state_path(tenant)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(job_config(target), f)
+    os.replace(tmp, path)
+
+
+def clear_tenant_config(tenant: str):
+    _tenant_managers.pop(tenant, None)
+    try:
+        os.remove(_tenant_state_path(tenant))
+    except FileNotFoundError:
+        pass
+
+
+def tenant_manager(tenant: str, settings_dict: dict) -> VectorStoreManager:
+    """
+    Returns the manager over a tenant's collection, built from the settings its
+    first upload recorded, so a new shared manager never moves the tenant to
+    another store or embedding model. A tenant without uploads gets settings_dict.
+    """
+    path = _tenant_state_path(tenant)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        _tenant_managers.pop(tenant, None)
+        return get_manager(settings_dict).for_tenant(tenant)
+    cached = _tenant_managers.get(tenant)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path) as f:
+            target = VectorStoreManager(**json.load(f))
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Warning: ignoring unreadable tenant state {path}: {e}")
+        return get_manager(settings_dict).for_tenant(tenant)
+    _tenant_managers[tenant] = (mtime, target)
+    return target
+
+
+def token_tenant(token: str):
+    """The tenant a request's token belongs to, None without a token; 401 for an invalid token."""
+    if not token:
+        return None
+    payload = decode_access_token(token)
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return tenant_id(payload)
+
+
+def resolve_manager(token: str, settings_dict: dict) -> VectorStoreManager:
+    """
+    Returns the manager a request works on: the tenant's own collection for a
+    valid token, the shared collection without one. Raises 401 for an invalid
+    token and 400 when no shared database is loaded.
+    """
+    tenant = token_tenant(token)
+    if tenant is not None:
+        return tenant_manager(tenant, settings_dict)
+    if not manager:
+        raise HTTPException(
+            status_code=400,
+            detail="No database loaded. Please upload files first."
+        )
+    return manager
+
+
+def save_manager_state(target: VectorStoreManager, llm_model: str):
+    """Records the active configuration so the next start can restore and warm it up."""
+    tmp = f"{MANAGER_STATE_PATH}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"manager": job_config(target), "llm_model": llm_model}, f)
+    os.replace(tmp, MANAGER_STATE_PATH)
+
+
+def load_manager_state():
+    try:
+        with open(MANAGER_STATE_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable manager state {MANAGER_STATE_PATH}: {e}")
+        return None
+
+
+def clear_manager_state():
+    try:
+        os.remove(MANAGER_STATE_PATH)
+    except FileNotFoundError:
+        pass
+
+
+def restore_manager():
+    """Rebuilds the last active manager if its database is still on disk."""
+    global manager
+    state = load_manager_state()
+    if manager is not None or not state:
+        return
+    config = state.get("manager", {})
+    if not os.path.exists(config.get("persist_directory", "")):
+        return
+    try:
+        manager = VectorStoreManager(**config)
+    except (TypeError, ValueError) as e:
+        print(f"Warning: could not restore the last manager: {e}")
+
+
+async def warm_up():
+    """
+    Loads the embedding and LLM models with a keep-alive, retrying up to
+    WARMUP_MAX_ATTEMPTS times, then opens the active collection and runs one
+    search so its index is in memory before the first question. /ready reports
+    progress; if Ollama never answers, the status becomes "unavailable" (still
+    503) with the last error, or "ready" with READY_WITHOUT_MODELS.
+    """
+    # Building a manager imports the LangChain clients, so keep it off the event loop
+    await retrieval_pool.run(restore_manager)
+    target = manager
+    state = load_manager_state() or {}
+    embedding_model = target.embedding_model if target else DEFAULT_EMBEDDING_MODEL
+    llm_model = state.get("llm_model", DEFAULT_LLM_MODEL)
+
+    models_loaded = False
+    if WARMUP_ENABLED:
+        readiness["models"] = "loading"
+        for attempt in range(1, WARMUP_MAX_ATTEMPTS + 1):
+            try:
+                await generation_pool.run(warm_up_models, embedding_model, llm_model)
+                models_loaded = True
+                break
+            except Exception as e:
+                readiness["error"] = f"model warm-up failed: {e}"
+                if attempt == WARMUP_MAX_ATTEMPTS:
+                    print(f"Warning: {readiness['error']}; giving up after {attempt} attempts")
+                    break
+                print(f"Warning: {readiness['error']}; retrying in {WARMUP_RETRY_SECONDS:g}s")
+                await asyncio.sleep(WARMUP_RETRY_SECONDS)
+        readiness["models"] = {"embedding": embedding_model, "llm": llm_model} if models_loaded else "unavailable"
+    else:
+        readiness["models"] = "skipped"
+
+    if target is not None:
+        readiness["collection"] = "opening"
+        try:
+            store = await retrieval_pool.run(target.load_chroma)
+            if models_loaded:
+                await retrieval_pool.run(store.similarity_search, "warm-up", k=1)
+            readiness["collection"] = target.collection_name
+        except Exception as e:
+            # Not fatal: the collection opens again on the first question
+            readiness["collection"] = None
+            print(f"Warning: could not open collection {target.collection_name}: {e}")
+    if models_loaded or not WARMUP_ENABLED:
+        readiness["error"] = None
+        readiness["status"] = "ready"
+    else:
+        readiness["status"] = "ready" if READY_WITHOUT_MODELS else "unavailable"
+
+
+def job_config(target: VectorStoreManager) -> dict:
+    return {
+        "persist_directory": target.persist_directory,
+        "embedding_model": target.embedding_model,
+        "chunk_size": target.chunk_size,
+        "chunk_overlap": target.chunk_overlap,
+        "collection_name": target.collection_name,
+        "index_backend": target.index_backend,
+        "faiss_index": target.faiss_index,
+        "vector_dtype": target.vector_dtype,
+        "quantization": target.quantization,
+    }
 
 
 @app.get("/health")
@@ -44,124 +416,169 @@ async def health_check():
     return {"status": "healthy", "message": "BillyBot API is running"}
 
 
-#  Signup endpoint
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the models are loaded and the collection is open"""
+    if readiness["status"] != "ready":
+        return JSONResponse(status_code=503, content=readiness)
+    return readiness
+
+
+#  Signup endpoint (argon2 runs on the auth process pool)
 @app.post("/register")
-def register(user: dict):
-    if users.find_one({"email": user["email"]}):
+async def register(user: dict):
+    from pymongo.errors import DuplicateKeyError
+
+    if await users.find_one({"email": user["email"]}, projection={"_id": 1}):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    with metrics.stage("password_hash"):
+        user["password"] = await auth_pool.run(hash_password, user["password"])
+    try:
+        await users.insert_one(user)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup for the same email
         raise HTTPException(status_code=400, detail="Email already registered")
-    user["password"] = hash_password(user["password"])
-    print("Hashed password:", user["password"]) 
-    users.insert_one(user)
     return {"message": "User created successfully"}
 
 #  Login endpoint
 @app.post("/login")
-def login(user: dict):
-    db_user = users.find_one({"email": user["email"]})
-    if not db_user or not verify_password(user["password"], db_user["password"]):
+async def login(user: dict):
+    db_user = await users.find_one({"email": user["email"]})
+    if not db_user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    with metrics.stage("password_verify"):
+        valid = await auth_pool.run(verify_password, user["password"], db_user["password"])
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     token = create_access_token({"sub": str(db_user["_id"])})
     return {"access_token": token}
 
 
-# Upload file (requires JWT)
-@app.post("/upload")
-async def upload_file(file: UploadFile = File(...), token: str = ""):
-    payload = decode_access_token(token)
-    if not payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    user_id = payload.get("sub")
-    contents = await file.read()
-
-    uploads.insert_one({
-        "user_id": ObjectId(user_id),
-        "filename": file.filename,
-        "content_type": file.content_type,
-        "size": len(contents),
-    })
-
-    return {"message": "File uploaded successfully", "filename": file.filename}
-
-
-
-
+# Upload file (requires JWT); ingested into the tenant's own collection
 @app.post("/upload")
 async def upload_files(
-    files: List[UploadFile] = File(...),
-    settings: str = Form(...)
+    files: List[UploadFile] = File(None),
+    file: UploadFile = File(None),
+    settings: str = Form(None),
+    token: str = ""
 ):
     """
-    Upload and ingest PDF files into the vector database
+    Upload PDF files (as `files`, or a single `file`) and queue them for ingestion.
+    Returns 202 with a job_id; poll /jobs/{job_id} for progress.
+    With ?token=..., files go into the caller's tenant collection and each upload is
+    recorded for the user; otherwise into the shared collection from `settings`.
+    A tenant's first upload fixes its collection settings until its data is cleared.
     """
     global manager
-    
-    temp_paths = []
+
+    files = (files or []) + ([file] if file else [])
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+    for upload in files:
+        if not upload.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail=f"Only PDF files are allowed. Got: {upload.filename}")
     try:
-        # Parse settings
-        settings_dict = json.loads(settings)
-        
-        # Initialize manager with settings
-        manager = VectorStoreManager(
-            persist_directory=settings_dict.get("persistDir", "chroma_kb_db"),
-            embedding_model=settings_dict.get("embeddingModel", "nomic-embed-text"),
-            chunk_size=settings_dict.get("chunkSize", 1000),
-            chunk_overlap=settings_dict.get("chunkOverlap", 150),
-        )
-        
-        # Save uploaded files temporarily
-        for file in files:
-            if not file.filename.endswith('.pdf'):
-                raise HTTPException(status_code=400, detail=f"Only PDF files are allowed. Got: {file.filename}")
-            
-            # Create temporary file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-            content = await file.read()
-            temp_file.write(content)
-            temp_file.close()
-            temp_paths.append(temp_file.name)
-        
-        # Ingest PDFs
-        db = manager.ingest_pdfs(temp_paths, overwrite=False)
-        
-        # Clean up temporary files
-        for temp_path in temp_paths:
-            try:
-                os.unlink(temp_path)
-            except Exception as e:
-                print(f"Warning: Failed to delete temp file {temp_path}: {e}")
-        
-        return {
-            "message": f"Successfully ingested {len(files)} files into Chroma database",
-            "files_processed": len(files),
-            "persist_directory": manager.persist_directory
-        }
-        
+        settings_dict = json.loads(settings) if settings else {}
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid settings JSON")
+
+    payload = None
+    if token:
+        payload = decode_access_token(token)
+        if not payload:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        base = manager or get_manager(settings_dict)
+        target = tenant_manager(tenant_id(payload), settings_dict)
+    else:
+        # Initialize manager with settings (reused while they stay the same)
+        manager = base = target = get_manager(settings_dict)
+    # Restored and warmed up on the next start
+    save_manager_state(base, settings_dict.get("llmModel", DEFAULT_LLM_MODEL))
+
+    job_id = tenant = None
+    try:
+        # Stream uploaded files into the job's directory in fixed-size chunks
+        job_id, files_dir = jobs.new_job()
+        budget = UploadBudget()
+        sizes = []
+        for upload in files:
+            path = await save_upload(upload, files_dir, budget)
+            sizes.append(os.path.getsize(path))
+
+        # Ingestion runs in the background; poll /jobs/{job_id} for progress
+        tenant = tenant_id(payload) if payload is not None else None
+        job = jobs.submit(job_id, job_config(target), tenant=tenant)
+        if tenant is not None:
+            save_tenant_config(tenant, target)
     except Exception as e:
-        # Clean up temporary files on error
-        for temp_path in temp_paths:
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
+        if job_id and not jobs.get(job_id, tenant):
+            jobs.discard(job_id)
+        if isinstance(e, (HTTPException, PoolBusy, UploadTooLarge)):
+            raise
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+    content = {
+        "message": f"Queued {len(job['files'])} files for ingestion",
+        "job_id": job_id,
+        "status": job["status"],
+        "status_url": f"/jobs/{job_id}",
+        "collection": target.collection_name,
+        "persist_directory": target.persist_directory
+    }
+    if payload is not None:
+        from bson import ObjectId
+        from pymongo.errors import PyMongoError
+
+        try:
+            await uploads.insert_many([
+                {
+                    "user_id": ObjectId(payload.get("sub")),
+                    "filename": upload.filename,
+                    "content_type": upload.content_type,
+                    "size": size,
+                    "collection": target.collection_name,
+                    "job_id": job_id,
+                    "uploaded_at": datetime.now(timezone.utc),
+                }
+                for upload, size in zip(files, sizes)
+            ])
+        except PyMongoError as e:
+            # The job is already queued, so the client still needs its job_id
+            metrics.ERRORS.inc(where="upload_record")
+            print(f"Warning: could not record uploads for job {job_id}: {e}")
+            content["warning"] = "Upload history could not be recorded"
+
+    return JSONResponse(status_code=202, content=content)
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, token: str = ""):
+    """
+    Report an ingestion job's status, per-file and per-chunk progress, throughput and errors.
+    Jobs of a tenant's uploads are only found with that tenant's token.
+    """
+    job = jobs.get(job_id, token_tenant(token))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs")
+async def list_jobs(token: str = ""):
+    """
+    List the caller's ingestion jobs (the tenant's with a token, else the shared collection's), newest first
+    """
+    return {"jobs": jobs.list(token_tenant(token))}
+
 
 @app.post("/ask")
-async def ask_question_endpoint(request: dict):
+async def ask_question_endpoint(request: dict, token: str = ""):
     """
-    Ask a question to the chatbot
+    Ask a question to the chatbot (with a token, only the tenant's own documents are searched)
     """
-    global manager
-    
-    if not manager:
-        raise HTTPException(
-            status_code=400, 
-            detail="No database loaded. Please upload files first."
-        )
+    settings_dict = request.get("settings", {})
+    active = resolve_manager(token, settings_dict)
     
     try:
         # Extract question and settings from request
@@ -169,27 +586,161 @@ async def ask_question_endpoint(request: dict):
         if not question:
             raise HTTPException(status_code=400, detail="Question is required")
             
-        settings_dict = request.get("settings", {})
+        top_k = settings_dict.get("topK", 4)
+        model = settings_dict.get("llmModel", DEFAULT_LLM_MODEL)
+        version = active.collection_version()
         
-        # Load Chroma database
-        chroma_db = manager.load_chroma()
+        # Retrieval and generation run on their own pools (warm Chroma handle from the registry)
+        chroma_db = await retrieval_pool.run(active.load_chroma)
+        hit = await retrieval_pool.run(cached_answer, question, chroma_db, version, top_k=top_k, model=model)
+        if hit is not None:
+            return {"answer": hit["answer"], "question": question, "cached": True}
+        docs = await retrieval_pool.run(retrieve, question, chroma_db, top_k=top_k, collection_version=version)
         
         # Get answer
-        answer = answer_question(
-            question, 
-            chroma_db, 
-            top_k=settings_dict.get("topK", 4),
-            model=settings_dict.get("llmModel", "llama3")
+        answer = await generation_pool.run(
+            generate_answer,
+            question,
+            docs,
+            model=model
         )
+        remember_answer(question, answer, docs, version, top_k=top_k, model=model)
         
         return {
             "answer": answer,
             "question": question
         }
         
+    except (HTTPException, PoolBusy):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
+
+
+@app.post("/ask/batch")
+async def ask_batch_endpoint(request: dict, token: str = ""):
+    """
+    Answer many questions in one call: one embedding call and one bulk vector query
+    for all of them, then up to `concurrency` generations at a time. Results come
+    back in order, each with its own error and timings.
+    """
+    settings_dict = request.get("settings", {})
+    active = resolve_manager(token, settings_dict)
+
+    questions = request.get("questions")
+    if not isinstance(questions, list) or not questions:
+        raise HTTPException(status_code=400, detail="Questions are required")
+    if len(questions) > MAX_BATCH_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUESTIONS} questions per batch")
+
+    top_k = settings_dict.get("topK", 4)
+    model = settings_dict.get("llmModel", DEFAULT_LLM_MODEL)
+    try:
+        concurrency = int(request.get("concurrency", BATCH_CONCURRENCY))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Concurrency must be an integer")
+    # Never more in flight than the generation pool has workers, so a batch cannot fill its queue
+    concurrency = max(1, min(concurrency, generation_pool.max_workers))
+    version = active.collection_version()
+    start = time.perf_counter()
+    try:
+        chroma_db = await retrieval_pool.run(active.load_chroma)
+        items = await retrieval_pool.run(
+            prepare_batch, questions, chroma_db, top_k=top_k, model=model, collection_version=version
+        )
+    except PoolBusy:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def generate(item):
+        async with slots:
+            try:
+                await generation_pool.run(generate_item, item, model=model)
+            except PoolBusy as e:
+                item["error"] = str(e)
+
+    await asyncio.gather(*(generate(item) for item in items if item["docs"] is not None))
+    results = finish_batch(items, version, top_k=top_k, model=model)
+
+    return {
+        "results": results,
+        "count": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "cached": sum(1 for r in results if r["cached"]),
+        "timings": {"total_ms": (time.perf_counter() - start) * 1000}
+    }
+
+
+@app.post("/ask/stream")
+async def ask_question_stream_endpoint(request: dict, token: str = ""):
+    """
+    Ask a question and stream the answer as Server-Sent Events:
+    `sources`, then one `token` event per generated chunk, then `done` with timings.
+    """
+    settings_dict = request.get("settings", {})
+    active = resolve_manager(token, settings_dict)
+
+    question = request.get("question")
+    if not question:
+        raise HTTPException(status_code=400, detail="Question is required")
+
+    top_k = settings_dict.get("topK", 4)
+    model = settings_dict.get("llmModel", DEFAULT_LLM_MODEL)
+    version = active.collection_version()
+    try:
+        start = time.perf_counter()
+        chroma_db = await retrieval_pool.run(active.load_chroma)
+        hit = await retrieval_pool.run(cached_answer, question, chroma_db, version, top_k=top_k, model=model)
+        if hit is None:
+            docs = await retrieval_pool.run(retrieve, question, chroma_db, top_k=top_k, collection_version=version)
+        retrieval_ms = (time.perf_counter() - start) * 1000
+    except PoolBusy:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
+    if hit is not None:
+        async def cached_stream():
+            yield f"event: sources\ndata: {json.dumps(hit['sources'])}\n\n"
+            yield f"event: token\ndata: {json.dumps(hit['answer'])}\n\n"
+            yield f"event: done\ndata: {json.dumps({'retrieval_ms': retrieval_ms, 'cached': True})}\n\n"
+
+        return StreamingResponse(
+            cached_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    # Generation is drained on the generation pool; PoolBusy surfaces here as a 503
+    events = generation_pool.stream(stream_answer(
+        question,
+        chroma_db,
+        model=model,
+        docs=docs,
+    ))
+
+    async def event_stream():
+        tokens = []
+        try:
+            async for event, data in events:
+                if event == "token":
+                    tokens.append(data)
+                if event == "done":
+                    data = {"retrieval_ms": retrieval_ms, **data}
+                    remember_answer(question, "".join(tokens), docs, version, top_k=top_k, model=model)
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': f'Query failed: {str(e)}'})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @app.delete("/clear-database")
 async def clear_database():
@@ -208,10 +759,13 @@ async def clear_database():
         if manager:
             directories_to_clear.append(manager.persist_directory)
             manager = None  # Reset the manager
+        clear_manager_state()
         
         # Remove duplicates and clear all directories
         cleared_dirs = []
         for directory in set(directories_to_clear):
+            invalidate_collections(directory)
+            remove_manifests(directory)
             if os.path.exists(directory):
                 try:
                     shutil.rmtree(directory)
@@ -239,6 +793,44 @@ async def clear_database():
         )
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Stage latency histograms and counters in the Prometheus text format
+    """
+    # Rendering runs the component collectors, which may open the embedding cache
+    body = await asyncio.to_thread(metrics.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+@app.delete("/clear-tenant-data")
+async def clear_tenant_data(token: str = ""):
+    """
+    Delete the caller's own collection and upload records, leaving other tenants untouched
+    """
+    payload = decode_access_token(token)
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    tenant = tenant_id(payload)
+    target = tenant_manager(tenant, {})
+    try:
+        await ingestion_pool.run(target.delete_collection)
+    except PoolBusy:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to clear tenant data: {str(e)}")
+    clear_tenant_config(tenant)
+    deleted = (await uploads.delete_many({"collection": target.collection_name})).deleted_count
+
+    return {
+        "message": "Tenant data cleared successfully",
+        "collection": target.collection_name,
+        "deleted_uploads": deleted,
+        "status": "success"
+    }
+
+
 @app.get("/status")
 async def get_status():
     """
@@ -249,11 +841,18 @@ async def get_status():
     return {
         "database_loaded": manager is not None,
         "persist_directory": manager.persist_directory if manager else None,
-        "embedding_model": manager.embedding_model if manager else None
+        "embedding_model": manager.embedding_model if manager else None,
+        "pools": {pool.name: pool.stats() for pool in POOLS},
+        "embedding_cache": await asyncio.to_thread(embedding_cache_stats),
+        "query_cache": query_embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "token_cache": token_cache.stats()
     }
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     print(" Starting BillyBot API Server...")
     print(" Server will be available at: http://localhost:8000")
     print(" API Documentation: http://localhost:8000/docs")
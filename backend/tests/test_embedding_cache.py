@@ -0,0 +1,28 @@
+from embedding_cache import EmbeddingCache
+
+
+def vector(seed: float) -> list:
+    return [seed, seed + 1, seed + 2]
+
+
+def test_entry_count_tracks_inserts_replacements_and_eviction(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_entries=5)
+    cache.put_many("m", {f"h{i}": vector(i) for i in range(3)})
+    cache.put_many("m", {"h0": vector(10), "h3": vector(3)})
+    assert cache.stats()["entries"] == 4
+    assert cache.get_many("m", ["h0"]) == {"h0": vector(10)}
+
+    cache.put_many("m", {f"n{i}": vector(i) for i in range(4)})
+    assert cache.stats()["entries"] == 5
+    (stored,) = cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+    assert stored == 5
+    assert set(cache.get_many("m", [f"n{i}" for i in range(4)])) == {f"n{i}" for i in range(4)}
+
+
+def test_entry_count_survives_reopen_and_clear(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    EmbeddingCache(path).put_many("m", {"a": vector(0), "b": vector(1)})
+    cache = EmbeddingCache(path)
+    assert cache.stats()["entries"] == 2
+    cache.clear()
+    assert cache.stats()["entries"] == 0
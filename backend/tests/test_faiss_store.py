@@ -0,0 +1,183 @@
+import threading
+
+import numpy as np
+import pytest
+
+import faiss_store
+from faiss_store import FaissCollection
+
+DIMENSIONS = 16
+INDEX_TYPES = faiss_store.INDEX_TYPES
+QUANTIZATIONS = faiss_store.QUANTIZATIONS
+
+
+@pytest.fixture(autouse=True)
+def small_training_sets(monkeypatch):
+    # Let IVF and PQ train on test-sized collections instead of falling back to flat codes
+    monkeypatch.setattr(faiss_store, "IVF_MIN_TRAIN", 100)
+    monkeypatch.setattr(faiss_store, "PQ_MIN_TRAIN", 100)
+
+
+def vectors(n: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, DIMENSIONS)).astype(np.float32)
+
+
+def unit(rows: np.ndarray) -> np.ndarray:
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def ids(n: int, prefix: str = "c") -> list:
+    return [f"{prefix}{i}" for i in range(n)]
+
+
+def nearest(collection: FaissCollection, queries: np.ndarray) -> list:
+    return [found[0] if found else None for found in collection.query(queries, n_results=1)["ids"]]
+
+
+def assert_found(collection: FaissCollection, queries: np.ndarray, expected: list):
+    # PQ codes are lossy enough to miss the odd query even after rescoring; the rest are exact here
+    found = sum(a == b for a, b in zip(nearest(collection, queries), expected))
+    assert found >= (0.9 if collection._index_codec == "pq" else 1.0) * len(expected)
+
+
+@pytest.mark.parametrize("dtype", faiss_store.VECTOR_DTYPES)
+def test_upsert_replace_and_delete(tmp_path, dtype):
+    collection = FaissCollection(str(tmp_path), "flat", dtype=dtype)
+    original = vectors(3)
+    collection.upsert(ids(3), original, documents=["a", "b", "c"], metadatas=[{"n": i} for i in range(3)])
+    assert collection.count() == 3
+    assert collection.get(ids=["c1"]) == {"ids": ["c1"], "documents": ["b"], "metadatas": [{"n": 1}]}
+
+    replacement = vectors(1, seed=1)
+    collection.upsert(["c1"], replacement, documents=["b2"], metadatas=[{"n": 10}])
+    assert collection.count() == 3
+    assert collection.get(ids=["c1"])["documents"] == ["b2"]
+    assert nearest(collection, replacement) == ["c1"]
+
+    collection.delete(["c0"])
+    assert collection.count() == 2
+    assert collection.get(ids=["c0"])["ids"] == []
+    assert "c0" not in collection.query(original[:1], n_results=3)["ids"][0]
+    assert sorted(collection.get()["ids"]) == ["c1", "c2"]
+
+
+def test_upsert_keeps_last_duplicate_and_rejects_other_dimensions(tmp_path):
+    collection = FaissCollection(str(tmp_path), "flat")
+    batch = vectors(2)
+    collection.upsert(["dup", "dup"], batch, documents=["first", "second"])
+    assert collection.count() == 1
+    assert collection.get(ids=["dup"])["documents"] == ["second"]
+    with pytest.raises(ValueError):
+        collection.upsert(["wide"], np.ones((1, DIMENSIONS + 1), dtype=np.float32))
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+@pytest.mark.parametrize("quantization", QUANTIZATIONS)
+def test_reopen_maps_index_and_adds_rows_written_after_it(tmp_path, index_type, quantization):
+    collection = FaissCollection(str(tmp_path), index_type, quantization=quantization)
+    saved, later = vectors(300), vectors(20, seed=1)
+    collection.upsert(ids(300), saved)
+    collection.persist()
+    reopened = FaissCollection(str(tmp_path), index_type, quantization=quantization)
+    assert reopened._index_mapped
+    assert (reopened._index_kind, reopened._index_codec) == (index_type, quantization)
+    assert_found(reopened, saved[:20], ids(20))
+
+    # Written to the vector file and side table, but the index is not saved again
+    reopened.upsert(ids(20, "later"), later)
+    del collection, reopened
+    restarted = FaissCollection(str(tmp_path), index_type, quantization=quantization)
+    assert restarted.count() == 320
+    assert restarted._index.ntotal == 320
+    assert_found(restarted, later, ids(20, "later"))
+    assert_found(restarted, saved[:20], ids(20))
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+@pytest.mark.parametrize("quantization", QUANTIZATIONS)
+def test_compaction_keeps_each_id_with_its_vector(tmp_path, index_type, quantization):
+    collection = FaissCollection(str(tmp_path), index_type, quantization=quantization)
+    stored = vectors(600)
+    collection.upsert(ids(600), stored, documents=ids(600))
+    collection.delete(ids(600)[::2])
+    collection.persist()
+    assert collection._generation == 1
+    assert collection._rows == collection.count() == 300
+    assert (collection._index_kind, collection._index_codec) == (index_type, quantization)
+
+    live = list(range(1, 600, 2))
+    for reader in (collection, FaissCollection(str(tmp_path), index_type, quantization=quantization)):
+        rows = reader._live_rows([f"c{i}" for i in live])
+        for i in live:
+            np.testing.assert_allclose(reader._vector_rows()[rows[f"c{i}"]], unit(stored[i:i + 1])[0], atol=1e-6)
+        assert reader.get(ids=["c1"])["documents"] == ["c1"]
+        assert_found(reader, stored[live[:20]], [f"c{i}" for i in live[:20]])
+        assert nearest(reader, stored[:1]) != ["c0"]
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+@pytest.mark.parametrize("quantization", QUANTIZATIONS)
+def test_configure_rebuilds_for_another_index(tmp_path, index_type, quantization):
+    collection = FaissCollection(str(tmp_path), "flat")
+    stored = vectors(300)
+    collection.upsert(ids(300), stored)
+    collection.configure(index_type, quantization)
+    assert (collection._index_kind, collection._index_codec) == (index_type, quantization)
+    assert_found(collection, stored[:20], ids(20))
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+@pytest.mark.parametrize("quantization", QUANTIZATIONS)
+def test_persist_after_deleting_every_row(tmp_path, index_type, quantization):
+    collection = FaissCollection(str(tmp_path), index_type, quantization=quantization)
+    collection.upsert(ids(20), vectors(20))
+    collection.delete(ids(20))
+    collection.persist()
+
+    assert collection.count() == 0
+    assert collection.query(vectors(1), n_results=3)["ids"] == [[]]
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+@pytest.mark.parametrize("quantization", QUANTIZATIONS)
+def test_reopen_after_deleting_every_row(tmp_path, index_type, quantization):
+    collection = FaissCollection(str(tmp_path), index_type, quantization=quantization)
+    collection.upsert(ids(20), vectors(20))
+    collection.persist()
+    collection.delete(ids(20))
+    del collection
+
+    reopened = FaissCollection(str(tmp_path), index_type, quantization=quantization)
+    assert reopened.count() == 0
+    reopened.upsert(ids(5, "new"), vectors(5, seed=1))
+    reopened.persist()
+    assert nearest(reopened, vectors(5, seed=1)[:1]) == ["new0"]
+
+
+def test_concurrent_queries_and_upserts(tmp_path):
+    collection = FaissCollection(str(tmp_path), "hnsw")
+    stored = vectors(200)
+    collection.upsert(ids(200), stored)
+    errors = []
+
+    def search():
+        try:
+            for _ in range(50):
+                assert nearest(collection, stored[:5]) == ids(5)
+        except Exception as e:
+            errors.append(e)
+
+    def write():
+        try:
+            for n in range(10):
+                collection.upsert(ids(10, f"w{n}_"), vectors(10, seed=100 + n))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(3)] + [threading.Thread(target=write)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert collection.count() == 300
@@ -0,0 +1,150 @@
+import json
+import os
+import pickle
+import shutil
+import zlib
+
+import numpy as np
+import pytest
+
+import vector_store
+from vector_store import VectorStoreManager, _file_sha256
+
+
+class Chunk:
+    def __init__(self, page_content: str, metadata: dict):
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+class FakeEmbeddings:
+    """Deterministic bag-of-words vectors; counts the texts it embeds."""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def _vector(self, text: str) -> list:
+        vector = np.zeros(32, dtype=np.float32)
+        for word in text.split():
+            vector[zlib.crc32(word.encode()) % 32] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def split_paragraphs(pdf_path, chunk_size, chunk_overlap, spill_path):
+    # Stands in for PDF parsing: one chunk per paragraph of a text file
+    with open(pdf_path) as f:
+        chunks = [Chunk(p, {"source": os.path.basename(pdf_path)}) for p in f.read().split("\n\n") if p]
+    with open(spill_path, "wb") as f:
+        pickle.dump(chunks, f)
+    return len(chunks), 0.0, 0.0
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "_load_and_split", split_paragraphs)
+    manager = VectorStoreManager(persist_directory=str(tmp_path / "db"), index_backend="faiss", faiss_index="flat")
+    manager._embeddings = FakeEmbeddings()
+    yield manager
+    vector_store.invalidate_collections(manager.persist_directory)
+
+
+def write(path, *paragraphs) -> str:
+    with open(path, "w") as f:
+        f.write("\n\n".join(paragraphs))
+    return str(path)
+
+
+def ingest(manager, *paths) -> dict:
+    report = {}
+    manager.ingest_pdfs(list(paths), parallel=False, report=report)
+    return report
+
+
+def stored_documents(manager) -> list:
+    return sorted(manager.load_chroma()._collection.get()["documents"])
+
+
+def test_unchanged_files_are_skipped(manager, tmp_path):
+    a = write(tmp_path / "a.pdf", "alpha one", "alpha two")
+    b = write(tmp_path / "b.pdf", "beta one")
+    first = ingest(manager, a, b)
+    assert sorted(first["ingested"]) == ["a.pdf", "b.pdf"]
+    assert first["embedded"] == 3
+
+    second = ingest(manager, a, b)
+    assert sorted(second["skipped"]) == ["a.pdf", "b.pdf"]
+    assert second["ingested"] == [] and second["embedded"] == 0
+    assert manager.embeddings.embedded == 3
+
+
+def test_changed_file_reuses_unchanged_chunks_and_removes_stale_ones(manager, tmp_path):
+    a = write(tmp_path / "a.pdf", "kept paragraph", "dropped paragraph", "also dropped")
+    b = write(tmp_path / "b.pdf", "other file")
+    ingest(manager, a, b)
+
+    write(tmp_path / "a.pdf", "kept paragraph", "new paragraph")
+    report = ingest(manager, a)
+    assert (report["embedded"], report["reused"], report["removed"]) == (1, 1, 2)
+    assert stored_documents(manager) == ["kept paragraph", "new paragraph", "other file"]
+
+    manifest = manager._open_manifest()
+    try:
+        stored = set(manager.load_chroma()._collection.get()["ids"])
+        assert set(manifest.chunk_ids("a.pdf")) | set(manifest.chunk_ids("b.pdf")) == stored
+        assert len(manifest.chunk_ids("a.pdf")) == 2
+        assert manifest.is_indexed(_file_sha256(a), manager._params_key())
+    finally:
+        manifest.close()
+
+
+def test_other_chunking_parameters_reingest(manager, tmp_path):
+    a = write(tmp_path / "a.pdf", "alpha one", "alpha two")
+    ingest(manager, a)
+    manager.chunk_size += 100
+    report = ingest(manager, a)
+    assert report["skipped"] == []
+    assert (report["embedded"], report["removed"]) == (2, 2)
+    assert stored_documents(manager) == ["alpha one", "alpha two"]
+
+
+def test_removed_index_resets_the_manifest(manager, tmp_path):
+    a = write(tmp_path / "a.pdf", "alpha one", "alpha two")
+    ingest(manager, a)
+    vector_store.invalidate_collections(manager.persist_directory)
+    shutil.rmtree(manager.persist_directory)
+
+    report = ingest(manager, a)
+    assert report["skipped"] == [] and report["embedded"] == 2
+    assert stored_documents(manager) == ["alpha one", "alpha two"]
+
+
+def test_json_manifest_from_older_release_is_imported(manager, tmp_path):
+    a = write(tmp_path / "a.pdf", "alpha one")
+    ingest(manager, a)
+    manifest = manager._open_manifest()
+    chunk_ids = manifest.chunk_ids("a.pdf")
+    manifest.close()
+    os.remove(manager._manifest_path())
+    legacy = manager._manifest_path("json")
+    with open(legacy, "w") as f:
+        json.dump({"files": {"a.pdf": {
+            "sha256": _file_sha256(a), "params": manager._params_key(), "chunks": chunk_ids,
+        }}}, f)
+
+    report = ingest(manager, a)
+    assert report["skipped"] == ["a.pdf"]
+    assert not os.path.exists(legacy)
+
+
+def test_delete_collection_removes_its_manifest(manager, tmp_path):
+    ingest(manager, write(tmp_path / "a.pdf", "alpha one"))
+    assert os.path.exists(manager._manifest_path())
+    manager.delete_collection()
+    assert not os.path.exists(manager._manifest_path())
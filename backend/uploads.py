@@ -0,0 +1,91 @@
+# uploads.py
+"""
+Copies uploaded files to temp storage in fixed-size chunks, so peak memory
+stays flat no matter how large an upload is. Files keep their original
+(sanitized) names, which become the `source` of their chunks.
+"""
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_FILE_BYTES = int(float(os.getenv("BILLYBOT_MAX_UPLOAD_FILE_MB", "200")) * 1024 * 1024)
+MAX_UPLOAD_REQUEST_BYTES = int(float(os.getenv("BILLYBOT_MAX_UPLOAD_REQUEST_MB", "1024")) * 1024 * 1024)
+
+
+class UploadTooLarge(Exception):
+    """Raised when a file or a whole request exceeds its size limit."""
+
+
+class UploadBudget:
+    """
+    Tracks bytes written across all files of one request.
+    """
+
+    def __init__(self, max_file_bytes: int = MAX_UPLOAD_FILE_BYTES, max_request_bytes: int = MAX_UPLOAD_REQUEST_BYTES):
+        self.max_file_bytes = max_file_bytes
+        self.max_request_bytes = max_request_bytes
+        self.total = 0
+
+    def consume(self, filename: str, file_bytes: int, chunk_bytes: int):
+        self.total += chunk_bytes
+        if file_bytes > self.max_file_bytes:
+            raise UploadTooLarge(f"{filename} exceeds the {self.max_file_bytes // (1024 * 1024)} MB per-file limit")
+        if self.total > self.max_request_bytes:
+            raise UploadTooLarge(f"Upload exceeds the {self.max_request_bytes // (1024 * 1024)} MB per-request limit")
+
+
+def make_upload_dir() -> str:
+    return tempfile.mkdtemp(prefix="billybot-upload-")
+
+
+def remove_upload_dir(upload_dir: str):
+    shutil.rmtree(upload_dir, ignore_errors=True)
+
+
+def _destination(upload_dir: str, filename: str) -> str:
+    name = re.sub(r"[^\w.\- ]", "_", Path(filename or "upload.pdf").name) or "upload.pdf"
+    path = os.path.join(upload_dir, name)
+    counter = 1
+    while os.path.exists(path):
+        stem, suffix = os.path.splitext(name)
+        path = os.path.join(upload_dir, f"{stem} ({counter}){suffix}")
+        counter += 1
+    return path
+
+
+async def save_upload(upload, upload_dir: str, budget: UploadBudget) -> str:
+    """
+    Streams a FastAPI UploadFile into upload_dir and returns the file path.
+    """
+    path = _destination(upload_dir, upload.filename)
+    written = 0
+    with open(path, "wb") as out:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            budget.consume(upload.filename, written, len(chunk))
+            out.write(chunk)
+    return path
+
+
+def save_fileobj(fileobj, filename: str, upload_dir: str, budget: UploadBudget) -> str:
+    """
+    Synchronous save_upload for file-like objects (e.g. Streamlit uploads).
+    """
+    path = _destination(upload_dir, filename)
+    written = 0
+    with open(path, "wb") as out:
+        while True:
+            chunk = fileobj.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            budget.consume(filename, written, len(chunk))
+            out.write(chunk)
+    return path
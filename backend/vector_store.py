@@ -1,21 +1,298 @@
 # vector_store.py
-import os
-from typing import List
-from pathlib import Path
-
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+"""
+Ingestion into and retrieval from per-collection vector stores.
 
-from langchain_ollama import OllamaEmbeddings
-from langchain_chroma import Chroma
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+The PDF loader, text splitter, Chroma and the embedding cache are imported
+where they are first used, so importing this module (and with it the API and
+the Streamlit app) does not pay for LangChain until a manager is built or a
+file is ingested.
+"""
+import glob
+import hashlib
+import json
+import multiprocessing
 import os
+import pickle
+import queue
+import re
 import shutil
+import sqlite3
 import tempfile
-import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import List
+
+from clients import get_embeddings
+from metrics import CHUNKS, ERRORS, observe_stage, stage
+
+
+# Process-wide registry of open collections so retrieval reuses a warm handle
+# instead of building a new Chroma client per request.
+# key: (abs persist_directory, collection_name, embedding_model, backend...) -> [db, last_used]
+COLLECTION_IDLE_TTL = float(os.getenv("BILLYBOT_COLLECTION_IDLE_TTL", "900"))
+_collections = {}
+_collections_lock = threading.Lock()
+# Opening a collection can be slow (a FAISS index may be rebuilt), so it happens
+# outside _collections_lock; only opens of the same collection wait on each other.
+_open_locks = {}
+
+# One ingest at a time per collection, so manifest updates never interleave.
+_ingest_locks = {}
+
+# Generation counters bumped whenever a directory or collection changes; part of
+# collection_version(), which keys the query and answer caches.
+_directory_generations = {}
+_collection_generations = {}
+
+# PDF text extraction is CPU-bound pure Python; parse and split files across processes.
+INGEST_WORKERS = int(os.getenv("BILLYBOT_INGEST_WORKERS", str(os.cpu_count() or 1)))
+
+# Embedding stage: chunks are embedded in batches with several batches in flight,
+# each retried with exponential backoff, and written to the collection as they complete.
+EMBED_BATCH_SIZE = int(os.getenv("BILLYBOT_EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY = int(os.getenv("BILLYBOT_EMBED_CONCURRENCY", "2"))
+EMBED_RETRIES = int(os.getenv("BILLYBOT_EMBED_RETRIES", "3"))
+EMBED_BACKOFF = float(os.getenv("BILLYBOT_EMBED_BACKOFF", "0.5"))
+
+# Parsed files buffered between the parse stage and the embedding stage. Parsed
+# chunks wait in spill files on disk, written and read back SPILL_BATCH_CHUNKS
+# at a time, so memory is bounded in chunks rather than by file size.
+PIPELINE_BUFFER_FILES = int(os.getenv("BILLYBOT_PIPELINE_BUFFER_FILES", "4"))
+SPILL_BATCH_CHUNKS = int(os.getenv("BILLYBOT_SPILL_BATCH_CHUNKS", "256"))
+
+# Vector index backend: "chroma", or "faiss" with a flat, ivf or hnsw index over
+# float32 or float16 vectors, optionally quantized to sq8 or pq codes (see faiss_store).
+INDEX_BACKENDS = ("chroma", "faiss")
+INDEX_BACKEND = os.getenv("BILLYBOT_INDEX_BACKEND", "chroma")
+FAISS_INDEX = os.getenv("BILLYBOT_FAISS_INDEX", "hnsw")
+FAISS_DTYPE = os.getenv("BILLYBOT_FAISS_DTYPE", "float32")
+FAISS_QUANTIZATION = os.getenv("BILLYBOT_FAISS_QUANTIZATION", "none")
+
+
+def _evict_idle_collections(now: float):
+    expired = [k for k, (_, last_used) in _collections.items() if now - last_used > COLLECTION_IDLE_TTL]
+    for key in expired:
+        del _collections[key]
+
+
+def invalidate_collections(persist_directory: str, collection_name: str = None):
+    """
+    Drops cached collection handles for a persist directory (all collections
+    unless one is given). Call before the directory is modified or removed.
+    """
+    root = os.path.abspath(persist_directory)
+    with _collections_lock:
+        for key in [k for k in _collections if k[0] == root and (collection_name is None or k[1] == collection_name)]:
+            del _collections[key]
+        _bump_generation(root, collection_name)
+
+
+def _bump_generation(root: str, collection_name: str = None):
+    # Caller holds _collections_lock
+    if collection_name is None:
+        _directory_generations[root] = _directory_generations.get(root, 0) + 1
+    else:
+        key = (root, collection_name)
+        _collection_generations[key] = _collection_generations.get(key, 0) + 1
+
+
+def _batched(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _prefetch(items, maxsize: int):
+    """
+    Runs the `items` iterator on a background thread, buffering at most maxsize
+    items ahead of the consumer. Exceptions are re-raised in the consumer; closing
+    the returned generator stops the producer.
+    """
+    buffer = queue.Queue(maxsize)
+    stop = threading.Event()
+    finished = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(finished)
+        except BaseException as e:
+            put(e)
+        finally:
+            close = getattr(items, "close", None)
+            if close:
+                close()
+
+    threading.Thread(target=produce, daemon=True, name="billybot-prefetch").start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is finished:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_path(persist_directory: str, collection_name: str, suffix: str = "sqlite") -> str:
+    """
+    Location of the ingest manifest for a collection: a hidden SQLite file next
+    to persist_directory, so it survives as long as the index does. Older
+    releases kept it as JSON (suffix "json").
+    """
+    root = os.path.abspath(persist_directory)
+    return os.path.join(os.path.dirname(root), f".{os.path.basename(root)}.{collection_name}.manifest.{suffix}")
+
+
+def remove_manifests(persist_directory: str):
+    """
+    Deletes the ingest manifests of every collection in persist_directory.
+    """
+    for path in glob.glob(manifest_path(persist_directory, "*", "*")):
+        os.remove(path)
+
+
+class _Manifest:
+    """
+    A collection's ingest manifest: each source file's content hash and
+    chunking parameters, and the chunk IDs it produced. Entries are read and
+    written one source at a time, so neither memory nor the cost of recording
+    a file grows with the corpus.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS files (source TEXT PRIMARY KEY, sha256 TEXT NOT NULL, params TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS files_content ON files (sha256, params);"
+            "CREATE TABLE IF NOT EXISTS chunks (source TEXT NOT NULL, id TEXT NOT NULL, PRIMARY KEY (source, id))"
+            " WITHOUT ROWID;"
+        )
+
+    def import_legacy(self, legacy: str):
+        """Moves the entries of a JSON manifest from an older release into this one."""
+        if os.path.exists(legacy):
+            with open(legacy) as f:
+                for source, entry in json.load(f)["files"].items():
+                    self.record(source, entry["sha256"], entry["params"], entry["chunks"])
+            os.remove(legacy)
+
+    def is_indexed(self, sha256: str, params: str) -> bool:
+        query = "SELECT 1 FROM files WHERE sha256 = ? AND params = ? LIMIT 1"
+        return self._conn.execute(query, (sha256, params)).fetchone() is not None
+
+    def chunk_ids(self, source: str) -> List[str]:
+        return [chunk_id for (chunk_id,) in self._conn.execute("SELECT id FROM chunks WHERE source = ?", (source,))]
+
+    def record(self, source: str, sha256: str, params: str, chunk_ids: List[str]):
+        with self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunks (source, id) VALUES (?, ?)", [(source, c) for c in chunk_ids]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (source, sha256, params) VALUES (?, ?, ?)", (source, sha256, params)
+            )
+
+    def clear(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM files")
+
+    def close(self):
+        self._conn.close()
+
 
+def tenant_collection_name(collection_name: str, tenant_id: str) -> str:
+    """
+    Name of a tenant's own collection: `<collection>_<tenant>`, or a hash of the
+    tenant ID when it is not a valid Chroma name or would exceed 63 characters.
+    """
+    name = f"{collection_name}_{tenant_id}"
+    if not re.fullmatch(r"[A-Za-z0-9_-]*[A-Za-z0-9]", tenant_id) or len(name) > 63:
+        name = f"{collection_name}_{hashlib.sha256(tenant_id.encode()).hexdigest()[:24]}"
+    return name
+
+
+def _load_and_split(pdf_path: str, chunk_size: int, chunk_overlap: int, spill_path: str) -> tuple:
+    """
+    Parses one PDF and splits it into chunks tagged with their source file,
+    appending them to spill_path as pickled lists of at most SPILL_BATCH_CHUNKS
+    chunks, so only one batch is ever held in memory here or in the reader.
+    Returns (chunk count, parse_seconds, split_seconds); the timings are returned
+    rather than recorded because this runs in a worker process.
+    """
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    count = 0
+    parse_seconds = split_seconds = 0.0
+    batch = []
+    # Pages flow to the splitter one at a time instead of loading the whole PDF first
+    pages = PyPDFLoader(pdf_path).lazy_load()
+    with open(spill_path, "wb") as f:
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            parsed = time.perf_counter()
+            parse_seconds += parsed - start
+            if page is None:
+                break
+            for s in splitter.split_documents([page]):
+                s.metadata = s.metadata or {}
+                s.metadata["source"] = Path(pdf_path).name
+                batch.append(s)
+            if len(batch) >= SPILL_BATCH_CHUNKS:
+                pickle.dump(batch, f)
+                count += len(batch)
+                batch = []
+            split_seconds += time.perf_counter() - parsed
+        if batch:
+            pickle.dump(batch, f)
+            count += len(batch)
+    return count, parse_seconds, split_seconds
+
+
+def _read_spill(spill_path: str):
+    """Yields the chunk batches _load_and_split wrote to spill_path."""
+    with open(spill_path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
 
 
 class VectorStoreManager:
@@ -26,52 +303,396 @@ class VectorStoreManager:
         chunk_size: int = 1000,
         chunk_overlap: int = 150,
         collection_name: str = "kb_documents",
+        embed_batch_size: int = EMBED_BATCH_SIZE,
+        embed_concurrency: int = EMBED_CONCURRENCY,
+        index_backend: str = INDEX_BACKEND,
+        faiss_index: str = FAISS_INDEX,
+        vector_dtype: str = FAISS_DTYPE,
+        quantization: str = FAISS_QUANTIZATION,
     ):
+        if index_backend not in INDEX_BACKENDS:
+            raise ValueError(f"Unknown index backend: {index_backend} (expected one of {', '.join(INDEX_BACKENDS)})")
+        if quantization != "none" and index_backend != "faiss":
+            raise ValueError("Quantization requires the faiss index backend")
         self.persist_directory = persist_directory
         self.embedding_model = embedding_model
         self.collection_name = collection_name
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.embed_batch_size = embed_batch_size
+        self.embed_concurrency = embed_concurrency
+        self.index_backend = index_backend
+        self.faiss_index = faiss_index
+        self.vector_dtype = vector_dtype
+        self.quantization = quantization
+        self._embeddings = None
 
-        # Ollama embeddings
-        self.embeddings = OllamaEmbeddings(model=self.embedding_model)
+    @property
+    def embeddings(self):
+        """
+        Shared, connection-pooled Ollama embeddings client behind the disk
+        embedding cache, built on first use so creating a manager stays cheap.
+        """
+        if self._embeddings is None:
+            from embedding_cache import CachedEmbeddings
 
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
+            self._embeddings = CachedEmbeddings(get_embeddings(self.embedding_model), self.embedding_model)
+        return self._embeddings
+
+    def for_tenant(self, tenant_id: str) -> "VectorStoreManager":
+        """
+        Returns a manager with the same settings over the tenant's own collection,
+        so a tenant's searches only scan (and only return) its own chunks.
+        """
+        return VectorStoreManager(
+            persist_directory=self.persist_directory,
+            embedding_model=self.embedding_model,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            collection_name=tenant_collection_name(self.collection_name, tenant_id),
+            embed_batch_size=self.embed_batch_size,
+            embed_concurrency=self.embed_concurrency,
+            index_backend=self.index_backend,
+            faiss_index=self.faiss_index,
+            vector_dtype=self.vector_dtype,
+            quantization=self.quantization,
+        )
+
+    def _registry_key(self):
+        return (
+            os.path.abspath(self.persist_directory), self.collection_name, self.embedding_model,
+            self.index_backend, self.faiss_index, self.quantization,
         )
 
-    def ingest_pdfs(self, pdf_paths: List[str], overwrite: bool = False):
+    def _manifest_path(self, suffix: str = "sqlite") -> str:
+        # Each backend keeps its own index of the collection, so each has its own manifest
+        if self.index_backend == "chroma":
+            return manifest_path(self.persist_directory, self.collection_name, suffix)
+        return manifest_path(self.persist_directory, f"{self.collection_name}.{self.index_backend}", suffix)
+
+    def collection_version(self) -> tuple:
+        """
+        Changes whenever the collection is ingested into or cleared, in this process
+        (generation counters) or another one (manifest modification time).
+        """
+        root = os.path.abspath(self.persist_directory)
+        try:
+            manifest_mtime = os.stat(self._manifest_path()).st_mtime_ns
+        except OSError:
+            manifest_mtime = None
+        # Lock-free: single dict reads are atomic, and this runs on the event loop
+        generations = (
+            _directory_generations.get(root, 0),
+            _collection_generations.get((root, self.collection_name), 0),
+        )
+        return (root, self.collection_name, self.embedding_model, self.index_backend, *generations, manifest_mtime)
+
+    def _ingest_lock(self) -> threading.Lock:
+        key = (os.path.abspath(self.persist_directory), self.collection_name)
+        with _collections_lock:
+            return _ingest_locks.setdefault(key, threading.Lock())
+
+    def _params_key(self) -> str:
+        params = f"{self.chunk_size}:{self.chunk_overlap}:{self.embedding_model}"
+        return hashlib.sha256(params.encode()).hexdigest()[:16]
+
+    def _chunk_id(self, params_key: str, doc) -> str:
+        key = f"{params_key}\0{doc.metadata.get('source')}\0{doc.page_content}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _open_manifest(self) -> _Manifest:
+        manifest = _Manifest(self._manifest_path())
+        manifest.import_legacy(self._manifest_path("json"))
+        if not os.path.exists(self.persist_directory):
+            # The index is gone, so nothing the manifest lists is stored any more
+            manifest.clear()
+        return manifest
+
+    def _iter_parsed(self, pdf_paths: List[str], parallel: bool, report: dict, report_lock, spill_dir: str):
+        """
+        Yields (pdf_path, spill_path) in input order, with at most a couple of files
+        per worker parsed ahead; their chunks wait on disk in spill_path (see
+        _load_and_split). Files that fail are recorded in report["failed"] and
+        yield None instead of aborting the batch.
+        """
+        spill_paths = {p: os.path.join(spill_dir, f"{n}.pkl") for n, p in enumerate(pdf_paths)}
+
+        def collect(pdf_path, get_result):
+            try:
+                count, parse_seconds, split_seconds = get_result()
+            except Exception as e:
+                ERRORS.inc(where="pdf_parse")
+                with report_lock:
+                    report["failed"].append({"file": Path(pdf_path).name, "error": str(e)})
+                if os.path.exists(spill_paths[pdf_path]):
+                    os.remove(spill_paths[pdf_path])
+                return None
+            observe_stage("pdf_parse", parse_seconds)
+            observe_stage("split", split_seconds)
+            CHUNKS.inc(count, kind="parsed")
+            return spill_paths[pdf_path] if count else None
+
+        def parse(pdf_path):
+            return _load_and_split(pdf_path, self.chunk_size, self.chunk_overlap, spill_paths[pdf_path])
+
+        workers = min(INGEST_WORKERS, len(pdf_paths))
+        if parallel and workers > 1:
+            # Spawned, not forked: ingest runs on a pool thread next to other live threads
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                paths = iter(pdf_paths)
+                pending = deque(
+                    (p, pool.submit(_load_and_split, p, self.chunk_size, self.chunk_overlap, spill_paths[p]))
+                    for p in islice(paths, workers * 2)
+                )
+                # Consume in submission order so the merged chunk stream is deterministic
+                while pending:
+                    pdf_path, future = pending.popleft()
+                    next_path = next(paths, None)
+                    if next_path is not None:
+                        pending.append((next_path, pool.submit(
+                            _load_and_split, next_path, self.chunk_size, self.chunk_overlap, spill_paths[next_path]
+                        )))
+                    yield pdf_path, collect(pdf_path, future.result)
+        else:
+            for pdf_path in pdf_paths:
+                yield pdf_path, collect(pdf_path, lambda: parse(pdf_path))
+
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(EMBED_RETRIES + 1):
+            try:
+                with stage("embed_batch"):
+                    return self.embeddings.embed_documents(texts)
+            except Exception:
+                ERRORS.inc(where="embed")
+                if attempt == EMBED_RETRIES:
+                    raise
+                time.sleep(EMBED_BACKOFF * 2 ** attempt)
+
+    def _write_batch(self, db, batch: list, vectors: List[List[float]]):
+        with stage("chroma_write"):
+            db._collection.upsert(
+                ids=[chunk_id for chunk_id, _ in batch],
+                embeddings=vectors,
+                documents=[d.page_content for _, d in batch],
+                metadatas=[d.metadata for _, d in batch],
+            )
+        CHUNKS.inc(len(batch), kind="embedded")
+
+    def _embed_and_write(self, db, batches, report: dict, report_lock, on_written=None):
+        """
+        Embeds batches of (chunk_id, doc) pairs with up to embed_concurrency batches
+        in flight, writing each batch to the collection as it completes and then
+        calling on_written(batch). `batches` may be a lazy iterator; it is only
+        pulled when a slot frees up. Updates report["embedded"] and
+        report["chunks_per_sec"] (holding report_lock) as it goes.
+        """
+        start = time.perf_counter()
+
+        def write_completed(done):
+            for future in done:
+                batch = in_flight.pop(future)
+                self._write_batch(db, batch, future.result())
+                with report_lock:
+                    report["embedded"] += len(batch)
+                    report["chunks_per_sec"] = report["embedded"] / max(time.perf_counter() - start, 1e-9)
+                if on_written:
+                    on_written(batch)
+
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.embed_concurrency) as pool:
+            try:
+                for batch in batches:
+                    if len(in_flight) >= self.embed_concurrency:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        write_completed(done)
+                    in_flight[pool.submit(self._embed_with_retry, [d.page_content for _, d in batch])] = batch
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    write_completed(done)
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                raise
+
+    def ingest_pdfs(
+        self, pdf_paths: List[str], overwrite: bool = False, parallel: bool = True, report: dict = None,
+        report_lock=None,
+    ):
+        """
+        Parses, chunks and embeds the PDFs into the collection. With `parallel`,
+        files are parsed across a process pool. Pass a dict as `report` to receive
+        the ingested, skipped and failed files, chunk counts and embedding throughput;
+        it is updated in place as ingestion progresses, from several threads. A file
+        counts as ingested once all of its chunks are written. To read the report
+        while ingestion runs, pass a lock as `report_lock` and copy the report while
+        holding it; every update is made under that lock.
+
+        Ingestion is incremental: files whose content hash is already indexed with
+        the same chunking parameters are skipped, chunks already in the collection
+        are reused, and chunks a re-uploaded file no longer produces are removed.
+
+        Ingestion is a streaming pipeline (files -> chunks -> embedding batches ->
+        collection writes) with bounded buffers between stages. Parsed chunks wait
+        in spill files on disk and are read back in batches, so memory depends on
+        batch sizes rather than file or corpus size, and each file becomes
+        searchable as soon as its last batch is written.
+        """
+        report = {} if report is None else report
+        report_lock = report_lock or threading.Lock()
+        with report_lock:
+            report.update({
+                "files_total": len(pdf_paths), "ingested": [], "skipped": [], "failed": [],
+                "chunks": 0, "to_embed": 0, "embedded": 0, "reused": 0, "removed": 0, "chunks_per_sec": 0.0,
+            })
+        with self._ingest_lock(), stage("ingest"):
+            return self._ingest(pdf_paths, overwrite, parallel, report, report_lock)
+
+    def _ingest(self, pdf_paths: List[str], overwrite: bool, parallel: bool, report: dict, report_lock):
+        invalidate_collections(self.persist_directory, self.collection_name)
         if overwrite and os.path.exists (self.persist_directory):
-            import shutil
+            invalidate_collections(self.persist_directory)
             shutil.rmtree(self.persist_directory)
+            remove_manifests(self.persist_directory)
+
+        params_key = self._params_key()
+        manifest = self._open_manifest()
+        try:
+            return self._ingest_new(pdf_paths, parallel, report, report_lock, params_key, manifest)
+        finally:
+            manifest.close()
 
-        docs = []
+    def _ingest_new(
+        self, pdf_paths: List[str], parallel: bool, report: dict, report_lock, params_key: str, manifest: _Manifest
+    ):
+        file_hashes = {}
+        to_parse = []
         for pdf_path in pdf_paths:
-            loader = PyPDFLoader(pdf_path)
-            pages = loader.load()
-            splits = self.splitter.split_documents(pages)
-            for s in splits:
-                s.metadata = s.metadata or {}
-                s.metadata["source"] = Path(pdf_path).name
-            docs.extend(splits)
+            file_hashes[Path(pdf_path).name] = sha256 = _file_sha256(pdf_path)
+            if manifest.is_indexed(sha256, params_key):
+                with report_lock:
+                    report["skipped"].append(Path(pdf_path).name)
+            else:
+                to_parse.append(pdf_path)
 
-        if not docs:
-            raise ValueError("No documents found to ingest.")
+        chroma_db = self.load_chroma()
+        # source -> {"ids", "stale", "remaining", "parsed"} for files whose batches are still being written
+        pending = {}
 
-        chroma_db = Chroma.from_documents(
-            documents=docs,
-            embedding=self.embeddings,
-            persist_directory=self.persist_directory,
-            collection_name=self.collection_name,
-        )
+        def finish_file(source):
+            # All of this file's new chunks are written: drop its stale chunks and record it
+            state = pending.pop(source)
+            if state["stale"]:
+                chroma_db._collection.delete(ids=state["stale"])
+                CHUNKS.inc(len(state["stale"]), kind="removed")
+            manifest.record(source, file_hashes[source], params_key, state["ids"])
+            with _collections_lock:
+                _bump_generation(os.path.abspath(self.persist_directory), self.collection_name)
+            with report_lock:
+                report["removed"] += len(state["stale"])
+                report["ingested"].append(source)
+
+        def new_chunks(spill_dir):
+            # Content-address every chunk; only chunks not already stored get embedded
+            parsed = _prefetch(
+                self._iter_parsed(to_parse, parallel, report, report_lock, spill_dir), PIPELINE_BUFFER_FILES
+            )
+            for pdf_path, spill_path in parsed:
+                if spill_path is None:
+                    continue
+                source = Path(pdf_path).name
+                state = pending[source] = {"ids": [], "stale": [], "remaining": 0, "parsed": False}
+                seen = set()
+                for splits in _read_spill(spill_path):
+                    chunks = {}
+                    for d in splits:
+                        chunk_id = self._chunk_id(params_key, d)
+                        if chunk_id not in seen:
+                            seen.add(chunk_id)
+                            chunks[chunk_id] = d
+                    existing = set()
+                    if chunks:
+                        existing = set(chroma_db._collection.get(ids=list(chunks), include=[])["ids"])
+                    new = [(chunk_id, d) for chunk_id, d in chunks.items() if chunk_id not in existing]
+                    with report_lock:
+                        report["chunks"] += len(splits)
+                        report["reused"] += len(existing)
+                        report["to_embed"] += len(new)
+                    CHUNKS.inc(len(existing), kind="reused")
+                    state["ids"].extend(chunks)
+                    state["remaining"] += len(new)
+                    yield from new
+                os.remove(spill_path)
+                state["stale"] = [chunk_id for chunk_id in manifest.chunk_ids(source) if chunk_id not in seen]
+                state["parsed"] = True
+                if state["remaining"] == 0:
+                    finish_file(source)
+
+        def on_written(batch):
+            for _, d in batch:
+                state = pending[d.metadata["source"]]
+                state["remaining"] -= 1
+                # Batches of a file's first chunks can be written before its spill is fully read
+                if state["remaining"] == 0 and state["parsed"]:
+                    finish_file(d.metadata["source"])
+
+        spill_dir = tempfile.mkdtemp(prefix="billybot-ingest-")
+        try:
+            batches = _batched(new_chunks(spill_dir), self.embed_batch_size)
+            self._embed_and_write(chroma_db, batches, report, report_lock, on_written)
+        finally:
+            shutil.rmtree(spill_dir, ignore_errors=True)
         try:
             chroma_db.persist()
         except Exception:
             pass
 
+        if not report["chunks"] and not report["skipped"]:
+            failed = "; ".join(f"{f['file']}: {f['error']}" for f in report["failed"])
+            raise ValueError(f"No documents found to ingest. {failed}".strip())
         return chroma_db
 
     def load_chroma(self):
+        """
+        Returns the shared handle for this collection, opening it on first use:
+        a Chroma collection, or a FaissStore with the same methods.
+        """
+        key = self._registry_key()
+        root = os.path.abspath(self.persist_directory)
+        with _collections_lock:
+            _evict_idle_collections(time.monotonic())
+            entry = _collections.get(key)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                return entry[0]
+            open_lock = _open_locks.setdefault(key, threading.Lock())
+        with open_lock:
+            with _collections_lock:
+                entry = _collections.get(key)
+                if entry is not None:
+                    entry[1] = time.monotonic()
+                    return entry[0]
+                generations = (_directory_generations.get(root, 0), _collection_generations.get(key[:2], 0))
+            db = self._open_store()
+            with _collections_lock:
+                # Only cache the handle if the collection was not invalidated while it opened
+                if generations == (_directory_generations.get(root, 0), _collection_generations.get(key[:2], 0)):
+                    _collections[key] = [db, time.monotonic()]
+            return db
+
+    def _open_store(self):
+        if self.index_backend == "faiss":
+            # Imported here so the Chroma backend works without faiss installed
+            from faiss_store import FaissStore
+
+            return FaissStore(
+                os.path.join(self.persist_directory, "faiss", self.collection_name),
+                self.embeddings,
+                index_type=self.faiss_index,
+                dtype=self.vector_dtype,
+                quantization=self.quantization,
+            )
+        from langchain_chroma import Chroma
+
         return Chroma(
             persist_directory=self.persist_directory,
             embedding_function=self.embeddings,
@@ -83,7 +704,21 @@ class VectorStoreManager:
         return db.similarity_search(query, k=k)
 
 
+    def delete_collection(self):
+        """
+        Deletes this collection and its manifest, leaving the other collections in
+        the persist directory untouched.
+        """
+        with self._ingest_lock():
+            db = self.load_chroma()
+            invalidate_collections(self.persist_directory, self.collection_name)
+            db.delete_collection()
+            for path in glob.glob(f"{self._manifest_path()}*") + glob.glob(self._manifest_path("json")):
+                os.remove(path)
+
     def clear_database(self):
+        invalidate_collections(self.persist_directory)
+        remove_manifests(self.persist_directory)
         if os.path.exists(self.persist_directory):
             shutil.rmtree(self.persist_directory)
             return {"message": "Knowledge base cleared successfully"}
@@ -1,7 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { Send, Bot, User, Loader } from 'lucide-react';
 import { useSettings } from '../context/SettingsContext';
-import { askQuestion } from '../services/api';
+import { askQuestionStream } from '../services/api';
 
 const ChatInterface = () => {
   const [query, setQuery] = useState('');
@@ -27,17 +27,34 @@ const ChatInterface = () => {
     setQuery('');
     setIsLoading(true);
 
+    // Updates the bot message being streamed (always the last one)
+    const updateBotMessage = (update) => {
+      setMessages(prev => [...prev.slice(0, -1), update(prev[prev.length - 1])]);
+    };
+    let started = false;
+
     try {
-      const response = await askQuestion(query.trim(), settings);
-      const botMessage = { type: 'bot', content: response.answer };
-      setMessages(prev => [...prev, botMessage]);
+      await askQuestionStream(query.trim(), settings, (event, data) => {
+        if (event === 'token') {
+          if (!started) {
+            started = true;
+            setMessages(prev => [...prev, { type: 'bot', content: '' }]);
+          }
+          updateBotMessage(message => ({ ...message, content: message.content + data }));
+        } else if (event === 'error') {
+          throw new Error(data.detail);
+        }
+      });
+      if (!started) {
+        setMessages(prev => [...prev, { type: 'bot', content: '' }]);
+      }
     } catch (error) {
-      const errorMessage = { 
-        type: 'bot', 
-        content: `Error: ${error.response?.data?.detail || 'Failed to get response'}`,
+      const errorMessage = {
+        type: 'bot',
+        content: `Error: ${error.message || 'Failed to get response'}`,
         isError: true
       };
-      setMessages(prev => [...prev, errorMessage]);
+      setMessages(prev => (started ? [...prev.slice(0, -1), errorMessage] : [...prev, errorMessage]));
     } finally {
       setIsLoading(false);
     }
@@ -117,7 +134,7 @@ const ChatInterface = () => {
                 </div>
               </div>
             ))}
-            {isLoading && (
+            {isLoading && messages[messages.length - 1]?.type === 'user' && (
               <div className="flex justify-start">
                 <div className="flex items-start space-x-3">
                   <div className="flex-shrink-0 w-8 h-8 rounded-full bg-white text-gray-600 border border-gray-200 flex items-center justify-center">
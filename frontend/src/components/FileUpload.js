@@ -2,7 +2,7 @@ import React, { useState, useCallback } from 'react';
 import { useDropzone } from 'react-dropzone';
 import { Upload, FileText, X, CheckCircle, AlertCircle, Trash2 } from 'lucide-react';
 import { useSettings } from '../context/SettingsContext';
-import { uploadFiles, clearDatabase } from '../services/api';
+import { uploadFiles, waitForJob, clearDatabase } from '../services/api';
 
 const FileUpload = () => {
   const [uploadedFiles, setUploadedFiles] = useState([]);
@@ -45,11 +45,22 @@ const FileUpload = () => {
       formData.append('settings', JSON.stringify(settings));
 
       const response = await uploadFiles(formData);
+      setUploadedFiles([]);
+      const job = await waitForJob(response.job_id, ({ progress }) => {
+        if (!progress || progress.files_total === undefined) return;
+        setUploadStatus({
+          type: 'info',
+          message: `Processing... ${progress.ingested.length + progress.skipped.length + progress.failed.length}/${progress.files_total} files, `
+            + `${progress.embedded}/${progress.to_embed} new chunks embedded`
+        });
+      });
+      const { progress } = job;
       setUploadStatus({ 
         type: 'success', 
-        message: `${response.message} (Stored in: ${response.persist_directory})` 
+        message: `Ingested ${progress.ingested.length} files (${progress.embedded} new chunks, `
+          + `${progress.skipped.length} already indexed, ${progress.failed.length} failed) `
+          + `(Stored in: ${response.persist_directory})`
       });
-      setUploadedFiles([]);
     } catch (error) {
       const errorMessage = error.response?.data?.detail 
         || error.message 
@@ -208,25 +219,33 @@ const FileUpload = () => {
           className={`p-4 rounded-lg flex items-start space-x-3 ${
             uploadStatus.type === 'success'
               ? 'bg-green-50 border border-green-200'
-              : 'bg-red-50 border border-red-200'
+              : uploadStatus.type === 'info'
+                ? 'bg-blue-50 border border-blue-200'
+                : 'bg-red-50 border border-red-200'
           }`}
         >
           {uploadStatus.type === 'success' ? (
             <CheckCircle className="h-5 w-5 text-green-600 flex-shrink-0 mt-0.5" />
+          ) : uploadStatus.type === 'info' ? (
+            <FileText className="h-5 w-5 text-blue-600 flex-shrink-0 mt-0.5" />
           ) : (
             <AlertCircle className="h-5 w-5 text-red-600 flex-shrink-0 mt-0.5" />
           )}
           <div className="flex-1">
             <p
               className={`text-sm font-medium ${
-                uploadStatus.type === 'success' ? 'text-green-800' : 'text-red-800'
+                uploadStatus.type === 'success'
+                  ? 'text-green-800'
+                  : uploadStatus.type === 'info' ? 'text-blue-800' : 'text-red-800'
               }`}
             >
-              {uploadStatus.type === 'success' ? 'Success!' : 'Error'}
+              {uploadStatus.type === 'success' ? 'Success!' : uploadStatus.type === 'info' ? 'Ingesting' : 'Error'}
             </p>
             <p
               className={`text-sm mt-1 ${
-                uploadStatus.type === 'success' ? 'text-green-700' : 'text-red-700'
+                uploadStatus.type === 'success'
+                  ? 'text-green-700'
+                  : uploadStatus.type === 'info' ? 'text-blue-700' : 'text-red-700'
               }`}
             >
               {uploadStatus.message}
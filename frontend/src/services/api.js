@@ -48,18 +48,40 @@ export const getStatus = async () => {
 };
 
 /**
- * Upload PDF files with settings
+ * Upload PDF files with settings. Returns the queued ingestion job.
  */
 export const uploadFiles = async (formData) => {
   const response = await api.post('/upload', formData, {
     headers: {
       'Content-Type': 'multipart/form-data',
     },
-    timeout: 60000, // 60 second timeout for large files
+    timeout: 60000, // 60 second timeout for the transfer; ingestion continues in the background
   });
   return response.data;
 };
 
+/**
+ * Get an ingestion job's status and progress
+ */
+export const getJob = async (jobId) => {
+  const response = await api.get(`/jobs/${jobId}`);
+  return response.data;
+};
+
+/**
+ * Poll an ingestion job until it completes or fails.
+ * onProgress is called with the job after every poll.
+ */
+export const waitForJob = async (jobId, onProgress, intervalMs = 2000) => {
+  for (;;) {
+    const job = await getJob(jobId);
+    if (onProgress) onProgress(job);
+    if (job.status === 'completed') return job;
+    if (job.status === 'failed') throw new Error(job.error || 'Ingestion failed');
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
+
 /**
  * Ask a question to the chatbot
  */
@@ -71,6 +93,40 @@ export const askQuestion = async (question, settings) => {
   return response.data;
 };
 
+/**
+ * Ask a question and receive the answer as it is generated.
+ * onEvent is called with (event, data) for each `sources`, `token`, `done` or `error` event.
+ */
+export const askQuestionStream = async (question, settings, onEvent) => {
+  const response = await fetch(`${API_BASE_URL}/ask/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ question, settings }),
+  });
+  if (!response.ok) {
+    const error = await response.json().catch(() => ({}));
+    throw new Error(error.detail || `Request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const messages = buffer.split('\n\n');
+    buffer = messages.pop();
+    messages.forEach((message) => {
+      const event = message.match(/^event: (.*)$/m);
+      const data = message.match(/^data: (.*)$/m);
+      if (event && data) {
+        onEvent(event[1], JSON.parse(data[1]));
+      }
+    });
+  }
+};
+
 /**
  * Clear the vector database
  */
@@ -3,7 +3,6 @@ BillyBot Streamlit Interface - FIXED VERSION WITH WINDOWS SUPPORT
 Replace your existing streamlit_app.py with this file
 """
 import streamlit as st
-import tempfile
 import os
 import shutil
 import gc
@@ -12,16 +11,18 @@ from pathlib import Path
 
 # Import from local modules (works when run from project root)
 try:
-    from vector_store import VectorStoreManager
+    from vector_store import VectorStoreManager, invalidate_collections, remove_manifests
     from chatbot import answer_question
+    from uploads import UploadBudget, make_upload_dir, remove_upload_dir, save_fileobj
 except ImportError:
     # Try importing from backend directory if running from root
     import sys
     backend_path = os.path.join(os.path.dirname(__file__), 'backend')
     if os.path.exists(backend_path):
         sys.path.insert(0, backend_path)
-        from vector_store import VectorStoreManager
+        from vector_store import VectorStoreManager, invalidate_collections, remove_manifests
         from chatbot import answer_question
+        from uploads import UploadBudget, make_upload_dir, remove_upload_dir, save_fileobj
     else:
         st.error("❌ Cannot find backend modules. Make sure you're running from the correct directory.")
         st.stop()
@@ -85,11 +86,41 @@ st.markdown("""
 # Initialize session state
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
-if 'manager' not in st.session_state:
-    st.session_state.manager = None
 if 'last_settings' not in st.session_state:
     st.session_state.last_settings = None
 
+# Process-wide caches shared by all browser sessions
+MAX_CACHED_MANAGERS = int(os.getenv("BILLYBOT_STREAMLIT_MAX_MANAGERS", "8"))
+MAX_CACHED_STATS = 64
+
+
+@st.cache_resource(max_entries=MAX_CACHED_MANAGERS, show_spinner=False)
+def get_manager(persist_dir, embedding_model, chunk_size, chunk_overlap, index_backend, faiss_index):
+    """
+    One VectorStoreManager per distinct settings, shared across sessions.
+    Collection handles and Ollama clients are already process-wide (see
+    vector_store and clients), and ingests into one collection are serialized.
+    """
+    return VectorStoreManager(
+        persist_directory=persist_dir,
+        embedding_model=embedding_model,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        index_backend=index_backend,
+        faiss_index=faiss_index,
+    )
+
+
+@st.cache_data(max_entries=MAX_CACHED_STATS, show_spinner=False)
+def database_stats(persist_dir, collection_version):
+    """
+    Size and file count of the database directory. collection_version is part
+    of the cache key, so the directory is only walked again after an ingest or clear.
+    """
+    files = [f for f in Path(persist_dir).rglob('*') if f.is_file()]
+    return {"size_bytes": sum(f.stat().st_size for f in files), "files": len(files)}
+
+
 # Helper function to safely delete database (Windows-compatible)
 def safe_delete_database(persist_dir, max_retries=3):
     """
@@ -102,16 +133,19 @@ def safe_delete_database(persist_dir, max_retries=3):
     Returns:
         tuple: (success: bool, message: str)
     """
-    # First, try to release the manager
-    if st.session_state.manager:
-        try:
-            # Clear any references
-            st.session_state.manager = None
-            # Force garbage collection to release file handles
-            gc.collect()
-            time.sleep(0.5)  # Give OS time to release locks
-        except Exception as e:
-            st.warning(f"⚠️ Warning during cleanup: {e}")
+    # Drop the shared collection handles so their file locks can be released
+    invalidate_collections(persist_dir)
+    remove_manifests(persist_dir)
+
+    # First, release the shared managers (every session's) and cached stats
+    try:
+        get_manager.clear()
+        database_stats.clear()
+        # Force garbage collection to release file handles
+        gc.collect()
+        time.sleep(0.5)  # Give OS time to release locks
+    except Exception as e:
+        st.warning(f"⚠️ Warning during cleanup: {e}")
     
     # Try to delete with retries
     for attempt in range(max_retries):
@@ -194,6 +228,12 @@ top_k = st.sidebar.slider(
     value=4,
     help="Number of relevant chunks to retrieve"
 )
+vector_index = st.sidebar.selectbox(
+    "Vector Index",
+    options=["Chroma", "FAISS HNSW", "FAISS IVF", "FAISS Flat"],
+    help="Index backend; each backend keeps its own copy of the knowledge base"
+)
+index_backend, _, faiss_index = vector_index.lower().partition(" ")
 
 # Chunking settings
 st.sidebar.subheader("📄 Chunking Settings")
@@ -219,29 +259,24 @@ current_settings = {
     'persist_dir': persist_dir,
     'embedding_model': embedding_model,
     'chunk_size': chunk_size,
-    'chunk_overlap': chunk_overlap
+    'chunk_overlap': chunk_overlap,
+    'vector_index': vector_index
 }
 
 # Check if settings changed
 settings_changed = st.session_state.last_settings != current_settings
 
-# Initialize or update manager
-if st.session_state.manager is None or settings_changed:
-    try:
-        st.session_state.manager = VectorStoreManager(
-            persist_directory=persist_dir,
-            embedding_model=embedding_model,
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-        )
-        st.session_state.last_settings = current_settings
-        if settings_changed and st.session_state.last_settings is not None:
-            st.sidebar.success("✓ Settings updated!")
-    except Exception as e:
-        st.sidebar.error(f"❌ Failed to initialize manager: {str(e)}")
-        st.stop()
-
-manager = st.session_state.manager
+# Get the shared manager for these settings (built on first use)
+try:
+    manager = get_manager(
+        persist_dir, embedding_model, chunk_size, chunk_overlap, index_backend, faiss_index or "hnsw"
+    )
+    if settings_changed and st.session_state.last_settings is not None:
+        st.sidebar.success("✓ Settings updated!")
+    st.session_state.last_settings = current_settings
+except Exception as e:
+    st.sidebar.error(f"❌ Failed to initialize manager: {str(e)}")
+    st.stop()
 
 # System status
 st.sidebar.markdown("---")
@@ -276,33 +311,35 @@ with tab1:
         
         col1, col2 = st.columns([3, 1])
         with col1:
-            ingest_button = st.button("🚀 Ingest PDFs into Chroma", type="primary", use_container_width=True)
+            ingest_button = st.button(f"🚀 Ingest PDFs into {vector_index}", type="primary", use_container_width=True)
         with col2:
             overwrite = st.checkbox("Overwrite", value=False, help="Clear existing database before ingesting")
         
         if ingest_button:
             tmp_paths = []
+            upload_dir = make_upload_dir()
             try:
-                # Save uploaded files temporarily
+                # Copy uploaded files to temp storage in fixed-size chunks
                 with st.spinner("💾 Saving files..."):
+                    budget = UploadBudget()
                     for f in uploaded_files:
-                        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-                        tmp.write(f.read())
-                        tmp.flush()
-                        tmp.close()
-                        tmp_paths.append(tmp.name)
+                        tmp_paths.append(save_fileobj(f, f.name, upload_dir, budget))
                 
                 # Ingest PDFs
                 with st.spinner(f"🔄 Processing {len(tmp_paths)} PDF(s)... This may take a while."):
-                    db = manager.ingest_pdfs(tmp_paths, overwrite=overwrite)
+                    report = {}
+                    db = manager.ingest_pdfs(tmp_paths, overwrite=overwrite, report=report)
                     
                 st.markdown(f"""
                 <div class="success-box">
                     <h4>✅ Success!</h4>
-                    <p>Ingested {len(tmp_paths)} file(s) into Chroma database.</p>
+                    <p>Ingested {len(report['ingested'])} file(s) ({report['embedded']} new chunks, {report['reused']} unchanged) into the {vector_index} index.</p>
+                    <p>Skipped {len(report['skipped'])} already indexed file(s).</p>
                     <p>Location: <code>{persist_dir}</code></p>
                 </div>
                 """, unsafe_allow_html=True)
+                for failed in report["failed"]:
+                    st.warning(f"⚠️ Skipped {failed['file']}: {failed['error']}")
                 
             except Exception as e:
                 st.markdown(f"""
@@ -314,11 +351,7 @@ with tab1:
             
             finally:
                 # Clean up temporary files
-                for tmp_path in tmp_paths:
-                    try:
-                        os.unlink(tmp_path)
-                    except Exception as e:
-                        st.warning(f"Could not delete temp file: {e}")
+                remove_upload_dir(upload_dir)
     
     st.markdown("---")
     st.markdown("""
@@ -368,13 +401,14 @@ with tab2:
                 })
                 
                 with st.spinner("🤔 Thinking..."):
-                    # Load database and get answer
+                    # Reuse the shared database handle and get answer
                     chroma_db = manager.load_chroma()
                     response = answer_question(
                         query,
                         chroma_db,
                         top_k=top_k,
-                        model=llm_model
+                        model=llm_model,
+                        collection_version=manager.collection_version()
                     )
                     
                     # Add assistant response to chat
@@ -416,19 +450,17 @@ with tab3:
     
     # Database info
     if os.path.exists(persist_dir):
-        db_path = Path(persist_dir)
-        
-        # Calculate database size
+        # Database size, recomputed only when the collection changes
         try:
-            total_size = sum(f.stat().st_size for f in db_path.rglob('*') if f.is_file())
-            size_mb = total_size / (1024 * 1024)
+            stats = database_stats(persist_dir, manager.collection_version())
+            size_mb = stats["size_bytes"] / (1024 * 1024)
             
             st.markdown(f"""
             <div class="info-box">
                 <h4>📊 Database Information</h4>
                 <ul>
                     <li><strong>Location:</strong> <code>{persist_dir}</code></li>
-                    <li><strong>Size:</strong> {size_mb:.2f} MB</li>
+                    <li><strong>Size:</strong> {size_mb:.2f} MB ({stats['files']} files)</li>
                     <li><strong>Embedding Model:</strong> {embedding_model}</li>
                     <li><strong>Chunk Size:</strong> {chunk_size} characters</li>
                     <li><strong>Chunk Overlap:</strong> {chunk_overlap} characters</li>
@@ -478,7 +510,6 @@ with tab3:
             
             if success:
                 # Clear session state
-                st.session_state.manager = None
                 st.session_state.chat_history = []
                 
                 st.markdown(f"""